@@ -1,13 +1,37 @@
+from __future__ import annotations
+
+import os
+import sys
 import time
+import mmap
+import struct
 import itertools
+import threading
 from io import BytesIO
 from os import PathLike
-from pathlib import Path
-from copy import deepcopy
-from typing import Callable, Generator, Any, Literal
+from typing import (
+    TYPE_CHECKING,
+    Callable,
+    Generator,
+    Iterable,
+    Sequence,
+    Any,
+    Literal,
+)
+
+from PIL import Image, ImageChops, ImageColor
+
+# The other modules are imported where they are used,
+# so `import gif` costs little more than `import PIL.Image`. See tests/test_import.py.
+if TYPE_CHECKING:
+    from pathlib import Path
+    from http.server import ThreadingHTTPServer
+
+    from PIL import ImageFont
+    from typing_extensions import Buffer
 
-from PIL import Image, ImageDraw, ImageFont
 
+SavePath = str | bytes | PathLike[str] | PathLike[bytes] | BytesIO
 
 global_color_config = {
     "color_border": "#000000",
@@ -35,10 +59,890 @@ def __print_progress_bar__(x: int, y: int, name: str, start: float):
 print_progress_bar = __print_progress_bar__
 
 
+class Progress:
+    """
+    Progress of a long operation, for example of `GIF.save` or `render_batch`.
+
+    The callback is called with this object at most once per `interval` seconds
+    and always when the operation is finished, so reporting costs little however many frames there are.
+    Several threads, fragments or processes can add to one progress.
+    """
+
+    def __init__(
+        self,
+        total: int,
+        callback: Callable[[Progress], Any],
+        *,
+        name: str = "",
+        interval: float = 0.1,
+        clock: Callable[[], float] = time.perf_counter,
+    ):
+        """
+
+        :param total: Number of steps, for example frames.
+        :param callback: (progress) -> None
+        :param name: What is being done, for example the path of the gif.
+        :param interval: The least number of seconds between two calls of the callback.
+        :param clock: Seconds, monotonic.
+        """
+        self.total = total
+        self.callback = callback
+        self.name = name
+        self.interval = interval
+        self.clock = clock
+        self.done = 0
+        self.start = clock()
+        self.__reported: float | None = None
+        self.__lock = threading.Lock()
+
+    def __repr__(self) -> str:
+        return (
+            f"{self.__class__.__name__}({self.done}/{self.total}, name={self.name!r})"
+        )
+
+    @property
+    def elapsed(self) -> float:
+        return self.clock() - self.start
+
+    @property
+    def fps(self) -> float:
+        """
+        Steps per second.
+        """
+        elapsed = self.elapsed
+        return self.done / elapsed if elapsed > 0 else 0.0
+
+    @property
+    def eta(self) -> float | None:
+        """
+        Seconds until the end or None while it is unknown.
+        """
+        fps = self.fps
+        return (self.total - self.done) / fps if fps else None
+
+    def update(self, steps: int = 1) -> None:
+        """
+        Adds the finished steps. 0 reports the progress without adding.
+
+        :param steps: Number of steps finished since the last update.
+        """
+        with self.__lock:
+            self.done += steps
+            now = self.clock()
+            if (
+                self.done < self.total
+                and self.__reported is not None
+                and now - self.__reported < self.interval
+            ):
+                return
+            self.__reported = now
+            self.callback(self)
+
+
+def progress_bar_sink(progress: Progress) -> None:
+    """
+    Prints `progress` as the progress bar. Used by `GIF(progress_bar=True)`.
+    """
+    print_progress_bar(progress.done, progress.total, progress.name, progress.start)
+
+
+_font_digests: dict[tuple[str, int, int], str] = {}
+
+
+def font_digest(font_path: str | Path | BytesIO) -> str:
+    """
+    Hash of the font file content.
+    The digest of a file is remembered while its size and mtime do not change.
+
+    :param font_path: Path to the font or the font file itself.
+    :return: Hex digest.
+    """
+    import hashlib
+
+    if isinstance(font_path, BytesIO):
+        return hashlib.sha256(font_path.getbuffer()).hexdigest()
+
+    stat = os.stat(font_path)
+    key = (os.path.abspath(font_path), stat.st_mtime_ns, stat.st_size)
+    if key not in _font_digests:
+        with open(font_path, "rb") as file:
+            _font_digests[key] = hashlib.sha256(file.read()).hexdigest()
+    return _font_digests[key]
+
+
+def _gif_frame_spans(data: bytes) -> tuple[int, list[tuple[int, int, int]]]:
+    """
+    Finds the frames in a gif file without decoding them.
+
+    :param data: Gif file.
+    :return: End of the header and (start, end, duration) of each frame.
+        A frame starts with the blocks that precede its image.
+    """
+    if data[:3] != b"GIF":
+        raise ValueError("Not a gif file")
+
+    position = 13
+    if data[10] & 0x80:
+        position += 3 << ((data[10] & 7) + 1)
+
+    def skip_sub_blocks(position_: int) -> int:
+        while data[position_]:
+            position_ += data[position_] + 1
+        return position_ + 1
+
+    header_end = None
+    frame_start = position
+    duration = 0
+    spans = []
+    while position < len(data) and data[position] != 0x3B:
+        if data[position] == 0x21:
+            if data[position + 1] == 0xF9:
+                if header_end is None:
+                    header_end = frame_start = position
+                duration = data[position + 4] | data[position + 5] << 8
+            position = skip_sub_blocks(position + 2)
+        elif data[position] == 0x2C:
+            if header_end is None:
+                header_end = frame_start = position
+            flags = data[position + 9]
+            position += 10
+            if flags & 0x80:
+                position += 3 << ((flags & 7) + 1)
+            position = skip_sub_blocks(position + 1)
+            spans.append((frame_start, position, duration * 10))
+            frame_start = position
+            duration = 0
+        else:
+            raise ValueError("Broken gif file")
+    return frame_start if header_end is None else header_end, spans
+
+
+def _led_gif(
+    size: tuple[int, int],
+    palette: bytes,
+    loop: int,
+    frames: Iterable[tuple[int, bytes | None]],
+) -> bytes:
+    """
+    Joins the encoded frames of `GIF.save(..., fast=True)` into a gif file.
+
+    :param size: Size of the gif in pixels.
+    :param palette: Global palette. Index 0 is transparent in the first frame.
+    :param loop: Looping gif. 0 for infinite loop.
+    :param frames: (duration, image block) of each frame.
+        A frame without a block is the same as the previous one and only makes it longer.
+    :return: Gif file.
+    """
+    joined: list[list[Any]] = []
+    for duration, block in frames:
+        if block is not None:
+            joined.append([duration, block])
+        elif joined:
+            joined[-1][0] += duration
+        else:
+            raise ValueError("The first frame of the gif is missing")
+
+    # The size of the color table is a power of 2
+    size_bits = max(len(palette) // 3 - 1, 1).bit_length() - 1
+    data = [
+        b"GIF89a",
+        struct.pack("<HHBBB", *size, 0xF0 | size_bits, 0, 0),
+        palette + bytes(3 * (2 << size_bits) - len(palette)),
+        b"!\xff\x0bNETSCAPE2.0\x03\x01" + struct.pack("<H", loop) + b"\0",
+    ]
+    for number, (duration, block) in enumerate(joined):
+        # Graphic control extension: do not dispose, the delay and
+        # the transparent index 0 for the corners of the first frame
+        data.append(
+            struct.pack(
+                "<3sBHBB", b"!\xf9\x04", 4 | (not number), int(duration / 10), 0, 0
+            )
+        )
+        data.append(block)
+    data.append(b";")
+    return b"".join(data)
+
+
+_fonts: dict[tuple, "ImageFont.FreeTypeFont"] = {}
+
+
+def load_font(font_path: str | Path | BytesIO, size: int) -> ImageFont.FreeTypeFont:
+    """
+    `ImageFont.truetype` that remembers the fonts loaded from files,
+    so every text of a batch does not read the font again.
+
+    :param font_path: Path to the font or the font file itself.
+    :param size: Font size.
+    :return: Font.
+    """
+    from PIL import ImageFont
+
+    if isinstance(font_path, BytesIO):
+        # `truetype` reads the file from its position, the same file can be loaded again
+        return ImageFont.truetype(BytesIO(font_path.getvalue()), size)
+
+    stat = os.stat(font_path)
+    key = (os.path.abspath(font_path), stat.st_mtime_ns, stat.st_size, size)
+    if key not in _fonts:
+        if len(_fonts) >= 64:
+            del _fonts[next(iter(_fonts))]
+        _fonts[key] = ImageFont.truetype(str(font_path), size)
+    return _fonts[key]
+
+
+# Font digest -> the codepoints of the font, see `font_codepoints`
+_font_codepoints: dict[str, list[int]] = {}
+# Font digests of a chain -> character -> index of the first font of the chain that has it
+_font_chains: dict[tuple[str, ...], dict[str, int]] = {}
+
+
+def _cmap_codepoints(data: bytes) -> list[int]:
+    """
+    Reads the Unicode subtables of the cmap table of a TrueType or OpenType font.
+    The first font of a collection is read.
+
+    :param data: Font file.
+    :return: Sorted ranges of the codepoints that have a glyph: [start, end, start, end, ...].
+        The ends are not included.
+    """
+    offset = struct.unpack_from(">I", data, 12)[0] if data[:4] == b"ttcf" else 0
+    (tables_count,) = struct.unpack_from(">H", data, offset + 4)
+    cmap = None
+    for table in range(tables_count):
+        tag, _, table_offset, _ = struct.unpack_from(
+            ">4sIII", data, offset + 12 + table * 16
+        )
+        if tag == b"cmap":
+            cmap = table_offset
+    if cmap is None:
+        raise ValueError("The font has no cmap table")
+
+    ranges: list[tuple[int, int]] = []
+    _, subtables_count = struct.unpack_from(">HH", data, cmap)
+    for subtable in range(subtables_count):
+        platform, encoding, subtable_offset = struct.unpack_from(
+            ">HHI", data, cmap + 4 + subtable * 8
+        )
+        if platform != 0 and (platform, encoding) not in ((3, 1), (3, 10)):
+            continue
+        position = cmap + subtable_offset
+        (subtable_format,) = struct.unpack_from(">H", data, position)
+        if subtable_format == 4:
+            segments = struct.unpack_from(">H", data, position + 6)[0] // 2
+            ends_at = position + 14
+            starts_at = ends_at + segments * 2 + 2
+            deltas_at = starts_at + segments * 2
+            range_offsets_at = deltas_at + segments * 2
+            for segment in range(segments):
+                end = struct.unpack_from(">H", data, ends_at + segment * 2)[0]
+                start = struct.unpack_from(">H", data, starts_at + segment * 2)[0]
+                delta = struct.unpack_from(">H", data, deltas_at + segment * 2)[0]
+                range_offset_at = range_offsets_at + segment * 2
+                range_offset = struct.unpack_from(">H", data, range_offset_at)[0]
+                for codepoint in range(start, min(end, 0xFFFE) + 1):
+                    if range_offset:
+                        glyph = struct.unpack_from(
+                            ">H",
+                            data,
+                            range_offset_at + range_offset + (codepoint - start) * 2,
+                        )[0]
+                        glyph = (glyph + delta) & 0xFFFF if glyph else 0
+                    else:
+                        glyph = (codepoint + delta) & 0xFFFF
+                    if glyph:
+                        ranges.append((codepoint, codepoint + 1))
+        elif subtable_format == 12:
+            (groups,) = struct.unpack_from(">I", data, position + 12)
+            for group in range(groups):
+                start, end, glyph = struct.unpack_from(
+                    ">III", data, position + 16 + group * 12
+                )
+                # Glyph 0 is the missing glyph
+                ranges.append((start + (glyph == 0), end + 1))
+
+    merged: list[int] = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1]:
+            merged[-1] = max(merged[-1], end)
+        elif start < end:
+            merged.extend((start, end))
+    return merged
+
+
+def font_codepoints(font_path: str | Path | BytesIO) -> list[int]:
+    """
+    The characters the font has a glyph for.
+    They are read once for each font file.
+
+    :param font_path: Path to the font or the font file itself.
+    :return: Sorted ranges of the codepoints: [start, end, start, end, ...]. The ends are not included.
+    """
+    digest = font_digest(font_path)
+    if digest not in _font_codepoints:
+        if isinstance(font_path, BytesIO):
+            data = font_path.getvalue()
+        else:
+            with open(font_path, "rb") as file:
+                data = file.read()
+        _font_codepoints[digest] = _cmap_codepoints(data)
+    return _font_codepoints[digest]
+
+
+def font_runs(
+    text: str, font_paths: Sequence[str | Path | BytesIO]
+) -> list[tuple[int, str]]:
+    """
+    Splits the text into runs of characters drawn with the same font of the chain.
+    Each character is drawn with the first font that has it, or with the first font if none has it.
+    The font of each character is remembered for the chain.
+
+    :param text: Text.
+    :param font_paths: Chain of fonts.
+    :return: (index of the font, characters).
+    """
+    from bisect import bisect_right
+
+    if len(font_paths) == 1:
+        return [(0, text)] if text else []
+    key = tuple(font_digest(font_path) for font_path in font_paths)
+    if key not in _font_chains:
+        if len(_font_chains) >= 64:
+            del _font_chains[next(iter(_font_chains))]
+        _font_chains[key] = {}
+    chain = _font_chains[key]
+
+    runs: list[tuple[int, str]] = []
+    run_start = 0
+    run_font = 0
+    for position, character in enumerate(text):
+        font_index = chain.get(character)
+        if font_index is None:
+            codepoint = ord(character)
+            font_index = next(
+                (
+                    index
+                    for index, font_path in enumerate(font_paths)
+                    if bisect_right(font_codepoints(font_path), codepoint) % 2
+                ),
+                0,
+            )
+            chain[character] = font_index
+        if position and font_index != run_font:
+            runs.append((run_font, text[run_start:position]))
+            run_start = position
+        run_font = font_index
+    if text:
+        runs.append((run_font, text[run_start:]))
+    return runs
+
+
+_gif_durations: dict[tuple, list[int]] = {}
+# Palette index 1 is the "on" color
+_index_to_leds = bytes([0, 255]) + bytes(254)
+
+
+def gif_durations(gif_file: Image.Image | BytesIO | str) -> list[int]:
+    """
+    Duration of each frame of the gif. The frames are not decoded.
+    The result for a file is remembered while its size and mtime do not change.
+
+    :param gif_file: GIF
+    :return: Durations in milliseconds.
+    """
+    import hashlib
+
+    if isinstance(gif_file, Image.Image) and getattr(gif_file, "filename", None):
+        gif_file = str(getattr(gif_file, "filename"))
+
+    key: tuple
+    if isinstance(gif_file, str):
+        stat = os.stat(gif_file)
+        key = (os.path.abspath(gif_file), stat.st_mtime_ns, stat.st_size)
+    elif isinstance(gif_file, BytesIO):
+        key = (hashlib.sha256(gif_file.getbuffer()).hexdigest(),)
+    elif isinstance(gif_file, Image.Image):
+        durations = []
+        for frame_index in itertools.count():
+            try:
+                gif_file.seek(frame_index)
+            except EOFError:
+                break
+            durations.append(gif_file.info.get("duration", 0))
+        return durations
+    else:
+        raise ValueError("Wrong type")
+
+    if key not in _gif_durations:
+        if isinstance(gif_file, str):
+            with open(gif_file, "rb") as file:
+                data = file.read()
+        else:
+            data = gif_file.getvalue()
+        if len(_gif_durations) >= 256:
+            del _gif_durations[next(iter(_gif_durations))]
+        _gif_durations[key] = [duration for _, _, duration in _gif_frame_spans(data)[1]]
+    return _gif_durations[key]
+
+
+class RenderCache:
+    """
+    On-disk cache of LED frames.
+
+    Each entry is one file named after the hash of the fragment definition.
+    It holds the state of every LED of every frame, so the colors
+    are still taken from `GIF.color_config` when saving.
+    Files are written atomically and the least recently used ones are removed
+    when the cache grows beyond `max_size`,
+    so several processes can share one directory.
+    """
+
+    version: int = 1
+    suffix: str = ".leds"
+    __header = struct.Struct("<4sBHHI")
+
+    def __init__(self, path: str | Path, max_size: int = 256 * 1024 * 1024):
+        """
+
+        :param path: Cache directory. Created if it does not exist.
+        :param max_size: Maximum total size of the cache files in bytes.
+        """
+        if max_size < 0:
+            raise ValueError("max_size must be greater than or equal to 0")
+
+        from pathlib import Path
+
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.max_size = max_size
+
+    @classmethod
+    def key(cls, **definition: Any) -> str:
+        """
+        :param definition: Everything that affects the LED frames of a fragment.
+        :return: Cache key.
+        """
+        import json
+        import hashlib
+
+        definition["version"] = cls.version
+        return hashlib.sha256(
+            json.dumps(definition, sort_keys=True, default=str).encode()
+        ).hexdigest()
+
+    def get(self, key: str, columns: int, rows: int) -> list[bytes] | None:
+        """
+
+        :param key: Cache key. `RenderCache.key(...)`
+        :param columns: Gif columns.
+        :param rows: Gif rows.
+        :return: LED frames or None if there is no such entry.
+        """
+        file_path = self.path / f"{key}{self.suffix}"
+        try:
+            with open(file_path, "rb") as file:
+                data = file.read()
+            os.utime(file_path)
+        except OSError:
+            return None
+
+        header_size = self.__header.size
+        if len(data) < header_size:
+            return None
+
+        magic, version, columns_, rows_, count = self.__header.unpack_from(data)
+        frame_size = columns * rows
+        if (
+            magic != b"RTGL"
+            or version != self.version
+            or (columns_, rows_) != (columns, rows)
+            or len(data) != header_size + count * frame_size
+        ):
+            return None
+
+        frames = []
+        for start in range(header_size, len(data), frame_size):
+            end = start + frame_size
+            frames.append(data[start:end])
+        return frames
+
+    def put(self, key: str, columns: int, rows: int, frames: list[bytes]) -> None:
+        """
+
+        :param key: Cache key. `RenderCache.key(...)`
+        :param columns: Gif columns.
+        :param rows: Gif rows.
+        :param frames: LED frames.
+        """
+        import tempfile
+        from pathlib import Path
+
+        fd, temp_path = tempfile.mkstemp(suffix=".tmp", dir=self.path)
+        try:
+            with os.fdopen(fd, "wb") as file:
+                file.write(
+                    self.__header.pack(
+                        b"RTGL", self.version, columns, rows, len(frames)
+                    )
+                )
+                file.writelines(frames)
+            os.replace(temp_path, self.path / f"{key}{self.suffix}")
+        except OSError:
+            # Another process is reading this entry right now (Windows).
+            Path(temp_path).unlink(missing_ok=True)
+            return
+        self.evict()
+
+    def evict(self) -> None:
+        """
+        Removes the least recently used entries until the cache fits into `max_size`.
+        """
+        from pathlib import Path
+
+        entries = []
+        for entry in os.scandir(self.path):
+            if not entry.name.endswith(self.suffix):
+                continue
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+        size = sum(entry_size for _, entry_size, _ in entries)
+        for _, entry_size, entry_path in sorted(entries):
+            if size <= self.max_size:
+                break
+            Path(entry_path).unlink(missing_ok=True)
+            size -= entry_size
+
+    def clear(self) -> None:
+        for entry in self.path.glob(f"*{self.suffix}"):
+            entry.unlink(missing_ok=True)
+
+
+class FrameStore:
+    """
+    LED frames in a memory-mapped file.
+
+    Every frame is a record of the same size:
+    the duration (uint32) followed by `columns * rows` bytes of LEDs.
+    The file is mapped in chunks, so it can grow
+    while the frames already given out stay valid.
+    """
+
+    chunk_frames: int = 1024
+    __duration = struct.Struct("<I")
+
+    def __init__(
+        self,
+        columns: int,
+        rows: int,
+        path: str | Path | None = None,
+        *,
+        chunk_frames: int | None = None,
+    ):
+        """
+
+        :param columns: Gif columns.
+        :param rows: Gif rows.
+        :param path: File for the frames. A temporary file is used by default.
+        :param chunk_frames: Minimum number of frames mapped at once.
+        """
+        if chunk_frames is not None:
+            self.chunk_frames = chunk_frames
+        if self.chunk_frames < 1:
+            raise ValueError("chunk_frames must be greater than or equal to 1")
+
+        self.columns = columns
+        self.rows = rows
+        self.frame_size = columns * rows
+        self.stride = self.__duration.size + self.frame_size
+        granularity = mmap.ALLOCATIONGRANULARITY
+        self.chunk_size = (
+            -(-self.stride * self.chunk_frames // granularity) * granularity
+        )
+        self.chunk_records = self.chunk_size // self.stride
+
+        import tempfile
+
+        self.file = tempfile.TemporaryFile() if path is None else open(path, "w+b")
+        self.__chunks: list[mmap.mmap] = []
+        self.__count = 0
+
+    def __len__(self) -> int:
+        return self.__count
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def __record(self, index: int) -> tuple[mmap.mmap, int]:
+        if not 0 <= index < self.__count:
+            raise IndexError("frame index out of range")
+        chunk_index, record_index = divmod(index, self.chunk_records)
+        return self.__chunks[chunk_index], record_index * self.stride
+
+    def append(self, leds: bytes, duration: int) -> int:
+        """
+
+        :param leds: `columns * rows` bytes row by row.
+        :param duration: Frame duration in milliseconds.
+        :return: Frame index.
+        """
+        if len(leds) != self.frame_size:
+            raise ValueError(
+                f"The size of this frame does not match the size of the store "
+                f"{len(leds)} != {self.frame_size}"
+            )
+
+        index = self.__count
+        if index == len(self.__chunks) * self.chunk_records:
+            offset = len(self.__chunks) * self.chunk_size
+            self.file.truncate(offset + self.chunk_size)
+            self.__chunks.append(
+                mmap.mmap(self.file.fileno(), self.chunk_size, offset=offset)
+            )
+
+        self.__count += 1
+        chunk, offset = self.__record(index)
+        self.__duration.pack_into(chunk, offset, duration)
+        leds_start = offset + self.__duration.size
+        leds_end = offset + self.stride
+        chunk[leds_start:leds_end] = leds
+        return index
+
+    def extend(self, leds_frames: list[bytes], duration: int) -> range:
+        """
+
+        :param leds_frames: LED frames.
+        :param duration: Duration of each frame in milliseconds.
+        :return: Frame indexes.
+        """
+        start = self.__count
+        for leds in leds_frames:
+            self.append(leds, duration)
+        return range(start, self.__count)
+
+    def leds(self, index: int) -> memoryview:
+        """
+        :return: LEDs of the frame without copying.
+        """
+        chunk, offset = self.__record(index)
+        leds_start = offset + self.__duration.size
+        leds_end = offset + self.stride
+        return memoryview(chunk)[leds_start:leds_end]
+
+    def duration(self, index: int) -> int:
+        chunk, offset = self.__record(index)
+        return self.__duration.unpack_from(chunk, offset)[0]
+
+    def close(self) -> None:
+        for chunk in self.__chunks:
+            try:
+                chunk.close()
+            except BufferError:
+                # Some frames are still in use. The mapping is released with them.
+                pass
+        self.__chunks.clear()
+        self.__count = 0
+        self.file.close()
+
+
+Frame = bytes | memoryview | Image.Image
+
+
+def _buffer_image(data: Buffer) -> tuple[Image.Image, int]:
+    """
+    The image of a NumPy array or another object with the buffer protocol of uint8 values.
+
+    (rows, columns) - grayscale, (rows, columns, 3) - RGB, (rows, columns, 4) - RGBA.
+    (frames, rows, columns) and (frames, rows, columns, 3 or 4) - a stack of frames,
+    they are one under another in the image.
+    The image shares the memory of a C-contiguous grayscale or RGBA array,
+    other arrays are copied.
+
+    :param data: Pixels.
+    :return: Image and the number of frames in it.
+    """
+    view = memoryview(data)  # type: ignore[arg-type]
+    if view.format not in ("B", "<B", "=B", ">B"):
+        raise ValueError(f'The array must be of uint8, not "{view.format}"')
+    shape = view.shape or ()
+    color = len(shape) == 4 or (len(shape) == 3 and shape[-1] in (3, 4))
+    if len(shape) - color not in (2, 3) or (color and shape[-1] not in (3, 4)):
+        raise ValueError(
+            f"The array must be (rows, columns), (rows, columns, 3 or 4) "
+            f"or a stack of them, not {shape}"
+        )
+    frames = shape[0] if len(shape) - color == 3 else 1
+    rows, columns = shape[-3:-1] if color else shape[-2:]
+    mode = {3: "RGB", 4: "RGBA"}[shape[-1]] if color else "L"
+    if not view.c_contiguous:
+        view = memoryview(view.tobytes())
+    image = Image.frombuffer(
+        mode, (columns, rows * frames), view.cast("B"), "raw", mode, 0, 1  # type: ignore[arg-type]
+    )
+    return image, frames
+
+
+class FrameBudget:
+    """
+    Limits of the frames of a fragment or of a whole gif.
+
+    When the frames do not fit, every x-th frame is taken and shown x times longer,
+    so the text and images move as many LEDs per second as without the budget.
+    The frames are counted and the size is estimated before anything is drawn.
+    """
+
+    def __init__(self, max_frames: int | None = None, max_bytes: int | None = None):
+        """
+
+        :param max_frames: Maximum number of frames.
+        :param max_bytes: Maximum estimated size of the gif file, see `GIF.estimate`.
+        """
+        if max_frames is not None and max_frames < 1:
+            raise ValueError("max_frames must be greater than or equal to 1")
+        if max_bytes is not None and max_bytes < 0:
+            raise ValueError("max_bytes must be greater than or equal to 0")
+        self.max_frames = max_frames
+        self.max_bytes = max_bytes
+
+    def __repr__(self) -> str:
+        return (
+            f"{self.__class__.__name__}"
+            f"(max_frames={self.max_frames!r}, max_bytes={self.max_bytes!r})"
+        )
+
+
+class Fragment:
+    """
+    Recipe of a fragment.
+
+    Adding a fragment only remembers its parameters.
+    The frames are built by `realize` when the fragment is needed for the first time
+    and are kept for the next time.
+    LED frames are drawn into images only while saving.
+    """
+
+    __ids = itertools.count()
+
+    def __init__(
+        self,
+        build: Callable[
+            [], tuple[list[bytes] | list[memoryview] | list[Image.Image], list[int]]
+        ],
+        *,
+        repeat: int = 1,
+        frame_store: FrameStore | None = None,
+        **definition: Any,
+    ):
+        """
+
+        :param build: () -> (frames, durations). Frames are LED bytes or images.
+        :param repeat: Number of times this fragment is repeated.
+        :param frame_store: Keep the LED frames in this store instead of memory.
+        :param definition: Parameters the fragment was added with.
+        """
+        self.id = next(self.__ids)
+        self.definition = definition
+        self.repeat = repeat
+        self.frame_store = frame_store
+        self.__build: (
+            Callable[
+                [],
+                tuple[list[bytes] | list[memoryview] | list[Image.Image], list[int]],
+            ]
+            | None
+        ) = build
+        self.__frames: list[bytes] | list[memoryview] | list[Image.Image] = []
+        self.__durations: list[int] = []
+        # Indexes of the frames in frame_store
+        self.__indexes: range | None = None
+
+    def __repr__(self) -> str:
+        parameters = ", ".join(f"{k}={v!r}" for k, v in self.definition.items())
+        return f"{self.__class__.__name__}({parameters}, repeat={self.repeat})"
+
+    def __len__(self) -> int:
+        self.realize()
+        if self.__indexes is not None:
+            return len(self.__indexes) * self.repeat
+        return len(self.__frames) * self.repeat
+
+    @property
+    def realized(self) -> bool:
+        return self.__build is None
+
+    def realize(self) -> None:
+        if self.__build is None:
+            return
+
+        frames, durations = self.__build()
+        if self.frame_store is not None and all(
+            not isinstance(frame, Image.Image) for frame in frames
+        ):
+            start = len(self.frame_store)
+            for leds, duration in zip(frames, durations):
+                self.frame_store.append(leds, duration)  # type: ignore[arg-type]
+            self.__indexes = range(start, len(self.frame_store))
+        else:
+            self.__frames = frames
+            self.__durations = durations
+        self.__build = None
+
+    def frames(self) -> Generator[Frame, Any, None]:
+        self.realize()
+        for _ in range(self.repeat):
+            if self.frame_store is not None and self.__indexes is not None:
+                for index in self.__indexes:
+                    yield self.frame_store.leds(index)
+            else:
+                yield from self.__frames
+
+    def durations(self) -> Generator[int, Any, None]:
+        self.realize()
+        for _ in range(self.repeat):
+            if self.frame_store is not None and self.__indexes is not None:
+                for index in self.__indexes:
+                    yield self.frame_store.duration(index)
+            else:
+                yield from self.__durations
+
+
+# Frames with all LEDs off and on by (columns, rows, color_config)
+_led_layers: dict[tuple, tuple[Image.Image, Image.Image]] = {}
+# For "P" frames by (columns, rows, color_config): the frame with all LEDs off,
+# the masks of the LEDs and of their light pixels, the palette indexes of the dark
+# and light pixels of each LED value and the palette. Index 0 is transparent.
+_led_palette_layers: dict[
+    tuple, tuple[Image.Image, Image.Image, Image.Image, list[int], list[int], list[int]]
+] = {}
+# The estimated size of the gif without frames and of one frame by (columns, rows, scale, color_config)
+_frame_sizes: dict[tuple, tuple[int, int]] = {}
+# The brightness of the LEDs is drawn in this many steps between off and on.
+# 120 is divisible by `levels - 1` of 2, 3, 4, 5, 6, 7, 9, 11, 13, 16, 21, ... levels,
+# so they are drawn exactly, and all steps fit into one palette of a gif.
+_intensity_steps = 120
+# LED value -> the nearest drawn brightness
+_intensity_lut = [
+    round(round(value * _intensity_steps / 255) * 255 / _intensity_steps)
+    for value in range(256)
+]
+
+
 class GIF:
     global_color_config: dict[str, str] = global_color_config
-    default_font_path: str = "./fonts/Monocraft.otf"
+    # The bundled font, wherever the current directory is
+    default_font_path: str = os.path.join(
+        os.path.dirname(os.path.abspath(__file__)), "fonts", "Monocraft.otf"
+    )
     __debug_path: str = "debug_image_frame_{fragment_index}.png"
+    # The least number of seconds between two updates of the progress bar
+    progress_interval: float = 0.1
+    # Number of characters of the text drawn at once by `generate_text_image`
+    text_chunk_size: int = 64
 
     def __init__(
         self,
@@ -46,13 +950,14 @@ class GIF:
         rows: int = 9,
         *,
         default_font_path: str | Path | None = None,
-        save_path: (
-            str | bytes | PathLike[str] | PathLike[bytes] | BytesIO | None
-        ) = None,
+        save_path: SavePath | list[SavePath] | None = None,
         loop: int = 0,
         debug: bool = False,
         debug_path: str | Path | None = None,
-        progress_bar: bool = True,
+        progress_bar: bool | Callable[[Progress], Any] = True,
+        cache: RenderCache | None = None,
+        frame_store: FrameStore | None = None,
+        scale: int = 1,
     ):
         """
 
@@ -64,6 +969,11 @@ class GIF:
         :param debug: Should debug images be printed?
         :param debug_path: Path to save debug images.
         :param progress_bar: Do I need to print the progress bar?
+            Or a function that takes the `Progress` of saving, it is called at most `progress_interval` seconds apart.
+        :param cache: Cache of LED frames for text fragments.
+        :param frame_store: Keep the LED frames of the fragments in this store instead of memory.
+        :param scale: Size of the drawn display. At 1 each LED is 2x2 pixels with the pitch of 3 pixels,
+            at 2 - 4x4 with the pitch of 6, the border is scaled with them.
         """
         if columns < 1:
             raise ValueError("Minimum width = 1")
@@ -71,9 +981,20 @@ class GIF:
             raise ValueError("Minimum height = 1")
         if loop < 0:
             raise ValueError("loop must be greater than or equal to 0")
+        if scale < 1:
+            raise ValueError("scale must be greater than or equal to 1")
+        if frame_store is not None and (frame_store.columns, frame_store.rows) != (
+            columns,
+            rows,
+        ):
+            raise ValueError(
+                f"The size of the frame store does not match the size of the current gif "
+                f"({frame_store.columns}, {frame_store.rows}) != ({columns}, {rows})"
+            )
 
         self.columns = columns
         self.rows = rows
+        self.scale = scale
         if default_font_path is not None:
             self.default_font_path = str(default_font_path)
         self.save_path = save_path
@@ -82,14 +1003,14 @@ class GIF:
         if debug_path is not None:
             self.debug_path = debug_path
         self.progress_bar = progress_bar
-        self.color_config: dict[str, str] = deepcopy(self.global_color_config)
-        self._fragments: list[
-            tuple[
-                Generator[Image.Image, Any, None] | list[Image.Image],
-                Generator[int, Any, None] | list[int] | int,
-                int,
-            ]
-        ] = []
+        self.cache = cache
+        self.frame_store = frame_store
+        self.color_config: dict[str, str] = self.global_color_config.copy()
+        self._fragments: list[Fragment] = []
+        self.__encoded_key: tuple | None = None
+        self.__encoded: dict[str, bytes] = {}
+        # Encoded frames of each fragment for `save(incremental=True)`
+        self.__fragment_blocks: dict[tuple, tuple[bytes, list[bytes]]] = {}
 
     def __enter__(self):
         if not self.save_path:
@@ -107,6 +1028,8 @@ class GIF:
 
     @debug_path.setter
     def debug_path(self, debug_path: str | Path):
+        from pathlib import Path
+
         debug_path_path = Path(debug_path)
         if debug_path_path.is_dir():
             raise ValueError("The debug_path must point to a file")
@@ -115,11 +1038,11 @@ class GIF:
 
     @property
     def columns_pixels(self):
-        return self.columns * 2 + self.columns + 2 + 5 + 6
+        return (self.columns * 2 + self.columns + 2 + 5 + 6) * self.scale
 
     @property
     def rows_pixels(self):
-        return self.rows * 2 + self.rows + 3 + 5 + 5
+        return (self.rows * 2 + self.rows + 3 + 5 + 5) * self.scale
 
     def generate_frame(
         self,
@@ -140,128 +1063,401 @@ class GIF:
         :param func: (column, row) -> is_on: bool
         :return:
         """
+        from PIL import ImageDraw
+
         columns_pixels = self.columns_pixels
         rows_pixels = self.rows_pixels
+        scale = self.scale
 
         image = Image.new("RGBA", (columns_pixels, rows_pixels), (0, 0, 0, 0))
         draw = ImageDraw.Draw(image)
         # border
         draw.rounded_rectangle(
             (0, 0, columns_pixels - 1, rows_pixels - 1),
-            radius=7,
+            radius=7 * scale,
             fill=self.color_config["color_border"],
         )
         # background
         draw.rectangle(
-            (5, 5, columns_pixels - 6, rows_pixels - 6),
+            (
+                5 * scale,
+                5 * scale,
+                columns_pixels - 5 * scale - 1,
+                rows_pixels - 5 * scale - 1,
+            ),
             self.color_config["color_background"],
         )
         # glare
-        draw.line(
-            (6, rows_pixels - 6, columns_pixels - 7, rows_pixels - 6),
+        draw.rectangle(
+            (
+                6 * scale,
+                rows_pixels - 6 * scale,
+                columns_pixels - 6 * scale - 1,
+                rows_pixels - 5 * scale - 1,
+            ),
             self.color_config["color_glare"],
         )
-        draw.line(
-            (columns_pixels - 6, 6, columns_pixels - 6, rows_pixels - 7),
+        draw.rectangle(
+            (
+                columns_pixels - 6 * scale,
+                6 * scale,
+                columns_pixels - 5 * scale - 1,
+                rows_pixels - 6 * scale - 1,
+            ),
             self.color_config["color_glare"],
         )
 
         # pixels
-        for column in range(self.columns):
-            for row in range(self.rows):
-                is_on = func(column, row)
-                start_pixel_column = 8 + (column * 2) + column - 1
-                start_pixel_row = 8 + (row * 2) + row - 1
-                string_is_on = "on" if is_on else "off"
-                color_dark_pixel = self.color_config[f"color_pixel_{string_is_on}_dark"]
-                color_light_pixel = self.color_config[
-                    f"color_pixel_{string_is_on}_light"
-                ]
-                draw.rectangle(
-                    (
-                        start_pixel_column,
-                        start_pixel_row,
-                        start_pixel_column + 1,
-                        start_pixel_row + 1,
-                    ),
-                    color_dark_pixel,
-                )
-                draw.point(
-                    (start_pixel_column, start_pixel_row),
-                    color_light_pixel,
-                )
+        # Every LED of a state is the same, the layers of all LEDs off and on
+        # are tiled from their cells and the LEDs are taken from one of them.
+        light_mask = self.__cells_mask(1)
+        layers = []
+        for state in ("off", "on"):
+            layer = Image.new(
+                "RGBA", light_mask.size, self.color_config[f"color_pixel_{state}_dark"]
+            )
+            layer.paste(
+                self.color_config[f"color_pixel_{state}_light"], mask=light_mask
+            )
+            layers.append(layer)
+        leds = bytes(
+            255 if func(column, row) else 0
+            for row in range(self.rows)
+            for column in range(self.columns)
+        )
+        is_on = Image.frombytes("L", (self.columns, self.rows), leds).resize(
+            light_mask.size, Image.Resampling.NEAREST
+        )
+        image.paste(
+            Image.composite(layers[1], layers[0], is_on),
+            (7 * scale, 7 * scale),
+            self.__cells_mask(2),
+        )
         return image
 
-    def generate_text_image(
-        self, text: str, font_path: str | BytesIO | None = None
-    ) -> Image.Image:
+    def __cells_mask(self, size: int) -> Image.Image:
         """
+        Mask of the top left `size`x`size` part of every LED cell.
+        Each LED is 2x2 in a 3x3 cell, the light pixel is the top left one,
+        the parts are multiplied by `scale`.
 
-        :param text: Text.
-        :param font_path: Path to the font.
-        :return: Text image.
+        :param size: 1 - the light pixels, 2 - the LEDs.
+        :return: "L" image of `columns * 3` by `rows * 3` cells.
         """
-        now_fragment_index = len(self._fragments)
-        if not text:
-            text = " "
-        font_path = self.default_font_path if font_path is None else font_path
-        font = ImageFont.truetype(font_path, 54)
-        temp_img_cols, temp_img_rows = (
-            int(font.getbbox(max(text.splitlines(), key=len))[2]) - 6,
-            54 * len(text.splitlines()) - 1,
+        cell = self.scale * 3
+        part = self.scale * size
+        row = (bytes((255,)) * part + bytes(cell - part)) * self.columns
+        return Image.frombytes(
+            "L",
+            (self.columns * cell, self.rows * cell),
+            (row * part + bytes(len(row) * (cell - part))) * self.rows,
         )
 
-        # Temporary image with text
-        temp_text_img = Image.new(
-            mode="RGB",
-            size=(temp_img_cols, temp_img_rows),
-            color="#FFFFFF",
+    def generate_led_frame(self, leds: bytes | memoryview) -> Image.Image:
+        """
+        The same as `generate_frame`, but the LEDs are taken from bytes.
+        The frames with all LEDs off and on are drawn once for each size and
+        `color_config`, and the LEDs are pasted from one onto the other.
+
+        :param leds: `columns * rows` bytes row by row. 0 - off, 255 - on.
+            The values between are dimmed, in `_intensity_steps` steps.
+        :return:
+        """
+        key = (self.columns, self.rows, self.scale, tuple(self.color_config.items()))
+        if key not in _led_layers:
+            if len(_led_layers) >= 64:
+                del _led_layers[next(iter(_led_layers))]
+            _led_layers[key] = (
+                self.generate_frame(),
+                self.generate_frame(lambda c, r: True),
+            )
+        off_image, on_image = _led_layers[key]
+
+        leds_image = Image.frombuffer(
+            "L", (self.columns, self.rows), leds, "raw", "L", 0, 1  # type: ignore[arg-type]
+        )
+        cell = self.scale * 3
+        mask = Image.new("L", off_image.size, 0)
+        mask.paste(
+            leds_image.point(_intensity_lut).resize(
+                (self.columns * cell, self.rows * cell), Image.Resampling.NEAREST
+            ),
+            (7 * self.scale, 7 * self.scale),
         )
-        draw_text = ImageDraw.Draw(im=temp_text_img)
-        draw_text.text(xy=(0, 0), text=text, fill="#000000", font=font)
+        return Image.composite(on_image, off_image, mask)
 
-        if self.debug:
-            temp_text_img.save(
-                self.debug_path.format(fragment_index=now_fragment_index)
+    def generate_led_palette_frame(self, leds: bytes | memoryview) -> Image.Image:
+        """
+        The same as `generate_led_frame`, but the frame is a "P" image.
+        All the frames of one size and `color_config` have the same palette,
+        so they can be encoded separately and joined into one gif.
+        The palette has the colors of every step of the brightness,
+        and the LEDs are mapped to them with lookup tables.
+        Index 0 is transparent.
+
+        :param leds: `columns * rows` bytes row by row. 0 - off, 255 - on.
+            The values between are dimmed, in `_intensity_steps` steps.
+        :return:
+        """
+        key = (self.columns, self.rows, self.scale, tuple(self.color_config.items()))
+        if key not in _led_palette_layers:
+            self.generate_led_frame(bytes(self.columns * self.rows))
+            off_image, on_image = _led_layers[key]
+            colors: dict[tuple[int, ...], int] = {(0, 0, 0, 0): 0}
+            for layer in (off_image, on_image):
+                for _, color in sorted(layer.getcolors() or []):
+                    colors.setdefault(tuple(color), len(colors))  # type: ignore[arg-type]
+
+            # The dark and light pixel of an LED at every step, blended as in `generate_led_frame`
+            steps = [
+                round(step * 255 / _intensity_steps)
+                for step in range(_intensity_steps + 1)
+            ]
+            pixel_colors = []
+            for state in ("off", "on"):
+                pixels = Image.new("RGBA", (2, 1))
+                pixels.putdata(
+                    [
+                        ImageColor.getrgb(
+                            self.color_config[f"color_pixel_{state}_dark"]
+                        ),
+                        ImageColor.getrgb(
+                            self.color_config[f"color_pixel_{state}_light"]
+                        ),
+                    ]
+                )
+                pixel_colors.append(pixels.resize((2, len(steps))))
+            mask = Image.new("L", (2, len(steps)))
+            mask.putdata([value for value in steps for _ in range(2)])
+            data = Image.composite(pixel_colors[1], pixel_colors[0], mask).tobytes()
+            blended = list(zip(data[0::4], data[1::4], data[2::4], data[3::4]))
+            dark_indexes = [
+                colors.setdefault(dark, len(colors)) for dark in blended[0::2]
+            ]
+            light_indexes = [
+                colors.setdefault(light, len(colors)) for light in blended[1::2]
+            ]
+            if len(colors) > 256:
+                raise ValueError("The colors of the LEDs do not fit into a gif palette")
+            palette = [value for color in colors for value in color[:3]]
+
+            data = off_image.tobytes()
+            pixels_ = zip(data[0::4], data[1::4], data[2::4], data[3::4])
+            off_indexes = Image.frombytes(
+                "L", off_image.size, bytes(colors[pixel] for pixel in pixels_)
+            )
+            led_mask = self.__cells_mask(2)
+            light_mask = self.__cells_mask(1)
+            levels = [round(value * _intensity_steps / 255) for value in range(256)]
+
+            if len(_led_palette_layers) >= 64:
+                del _led_palette_layers[next(iter(_led_palette_layers))]
+            _led_palette_layers[key] = (
+                off_indexes,
+                led_mask,
+                light_mask,
+                [dark_indexes[level] for level in levels],
+                [light_indexes[level] for level in levels],
+                palette,
             )
+        (
+            off_indexes,
+            led_mask,
+            light_mask,
+            dark_lut,
+            light_lut,
+            palette,
+        ) = _led_palette_layers[key]
 
-        text_cols = temp_img_cols * 9 * len(text.splitlines()) // temp_img_rows
-        img_cols = text_cols
+        leds_image = Image.frombuffer(
+            "L", (self.columns, self.rows), leds, "raw", "L", 0, 1  # type: ignore[arg-type]
+        )
+        size = led_mask.size
+        leds_indexes = leds_image.point(dark_lut).resize(size, Image.Resampling.NEAREST)
+        leds_indexes.paste(
+            leds_image.point(light_lut).resize(size, Image.Resampling.NEAREST),
+            mask=light_mask,
+        )
+        indexes = off_indexes.copy()
+        indexes.paste(leds_indexes, (7 * self.scale, 7 * self.scale), led_mask)
 
-        img_rows = 9 * len(text.splitlines())
+        frame = Image.frombytes("P", indexes.size, indexes.tobytes())
+        frame.putpalette(palette)
+        frame.info["transparency"] = 0
+        return frame
 
-        text_img = Image.new(
-            mode="RGB",
-            size=(img_cols, img_rows),
-            color="#FFFFFF",
+    def generate_text_image(
+        self, text: str, font_path: str | BytesIO | list[str | BytesIO] | None = None
+    ) -> Image.Image:
+        """
+        The text is drawn 6 times larger and every sixth pixel is taken.
+        It is drawn in pieces of `text_chunk_size` characters, each one only as large as its characters,
+        so long text and many lines do not need one large image.
+
+        :param text: Text.
+        :param font_path: Path to the font. Or a chain of fonts,
+            each character is drawn with the first font that has it, see `font_runs`.
+        :return: Text image.
+        """
+        from PIL import ImageDraw
+
+        now_fragment_index = len(self._fragments)
+        fonts, lines_runs, temp_img_cols, temp_img_rows = self.__text_layout(
+            text, font_path
         )
-        draw_text_resized = ImageDraw.Draw(im=text_img)
+        font = fonts[0]
+        baseline = font.getmetrics()[0]
+        text_cols = temp_img_cols * 9 * len(lines_runs) // temp_img_rows
+        img_rows = 9 * len(lines_runs)
 
-        if self.debug:
-            text_img.save(self.debug_path.format(fragment_index=now_fragment_index))
+        text_img = Image.new("L", (text_cols, img_rows), 255)
+        # The lines are placed as `ImageDraw.text` places the lines of multiline text
+        line_spacing = (
+            ImageDraw.Draw(Image.new("L", (1, 1))).textbbox((0, 0), "A", font)[3] + 4
+        )
+        for line_number, line_runs in enumerate(lines_runs):
+            next_chunk_x = 0.0
+            for run_font, run in line_runs:
+                font = fonts[run_font]
+                run_x = next_chunk_x
+                for chunk_start in range(0, len(run), self.text_chunk_size):
+                    chunk_end = chunk_start + self.text_chunk_size
+                    chunk = run[chunk_start:chunk_end]
+                    # Where the first character of the chunk is in the whole line.
+                    # The next one is where it is after this chunk, with the kerning between them.
+                    chunk_x = next_chunk_x
+                    if chunk_end < len(run):
+                        next_end = chunk_end + 1
+                        next_chunk_x += font.getlength(
+                            run[chunk_start:next_end]
+                        ) - font.getlength(run[chunk_end])
+                    if chunk.isspace():
+                        continue
+                    # The characters of the other fonts stand on the baseline of the first one
+                    anchor = "ls" if run_font else "la"
+                    chunk_y = line_number * line_spacing + (baseline if run_font else 0)
+                    left, top, right, bottom = font.getbbox(chunk, anchor=anchor)
+                    # The part of the large image with the characters of the chunk
+                    piece_left = max(int(chunk_x + min(left, 0)) - 1, 0)
+                    piece_right = min(int(chunk_x + right) + 2, temp_img_cols)
+                    piece_top = max(int(chunk_y + top) - 1, 0)
+                    piece_bottom = min(int(chunk_y + bottom) + 2, temp_img_rows)
+                    # The columns and rows whose pixels are in this part
+                    first_column = max(-(-(piece_left - 3) // 6), 0)
+                    first_pixel = first_column * 6 + 3
+                    columns = min(
+                        len(range(first_pixel, piece_right, 6)),
+                        text_cols - first_column,
+                    )
+                    first_row = max(-(-(piece_top - 3) // 6), 0)
+                    first_pixel_row = first_row * 6 + 3
+                    rows = min(
+                        len(range(first_pixel_row, piece_bottom, 6)),
+                        img_rows - first_row,
+                    )
+                    if columns <= 0 or rows <= 0:
+                        continue
 
-        for resized_column_pixel in range(text_cols):
-            for resized_row_pixel in range(img_rows):
-                column_pixel = resized_column_pixel * 6 + 3
-                row_pixel = resized_row_pixel * 6 + 3
-                if temp_img_cols < column_pixel or temp_img_rows < row_pixel:
-                    continue
-                image_text_pixel = temp_text_img.getpixel((column_pixel, row_pixel))
-                image_text_resized_pixel = (
-                    (255, 255, 255)
-                    if image_text_pixel == (255, 255, 255)
-                    else (0, 0, 0)
-                )
-                draw_text_resized.point(
-                    xy=(resized_column_pixel, resized_row_pixel),
-                    fill=image_text_resized_pixel,
-                )
+                    piece = Image.new(
+                        "L", (piece_right - piece_left, piece_bottom - piece_top), 255
+                    )
+                    ImageDraw.Draw(piece).text(
+                        xy=(chunk_x - piece_left, chunk_y - piece_top),
+                        text=chunk,
+                        fill=0,
+                        font=font,
+                        anchor=anchor,
+                    )
+                    piece_data = piece.tobytes()
+                    piece_cols = piece.size[0]
+                    pixels = []
+                    for row in range(rows):
+                        piece_row = first_pixel_row - piece_top + row * 6
+                        start = piece_row * piece_cols + first_pixel - piece_left
+                        end = start + (columns - 1) * 6 + 1
+                        pixels.append(piece_data[start:end:6])
+                    box = (
+                        first_column,
+                        first_row,
+                        first_column + columns,
+                        first_row + rows,
+                    )
+                    # The characters of neighbouring chunks can overlap
+                    text_img.paste(
+                        ImageChops.darker(
+                            text_img.crop(box),
+                            Image.frombytes("L", (columns, rows), b"".join(pixels)),
+                        ),
+                        box,
+                    )
+                # The fonts are not kerned with each other
+                next_chunk_x = run_x + font.getlength(run)
+
+        text_img = text_img.point(lambda value: 255 if value == 255 else 0).convert(
+            "RGB"
+        )
 
         if self.debug:
             text_img.save(self.debug_path.format(fragment_index=now_fragment_index))
 
         return text_img
 
+    def text_image_size(
+        self, text: str, font_path: str | BytesIO | list[str | BytesIO] | None = None
+    ) -> tuple[int, int]:
+        """
+        The size of `generate_text_image` without drawing the text.
+
+        :param text: Text.
+        :param font_path: Path to the font or a chain of fonts.
+        :return: (columns, rows)
+        """
+        _, lines_runs, temp_img_cols, temp_img_rows = self.__text_layout(
+            text, font_path
+        )
+        lines = len(lines_runs)
+        return temp_img_cols * 9 * lines // temp_img_rows, 9 * lines
+
+    def __text_layout(
+        self, text: str, font_path: str | BytesIO | list[str | BytesIO] | None
+    ) -> tuple[list[ImageFont.FreeTypeFont], list[list[tuple[int, str]]], int, int]:
+        """
+        :param text: Text.
+        :param font_path: Path to the font or a chain of fonts.
+        :return: Fonts, the runs of each line of `font_runs`
+            and the size of the text drawn 6 times larger.
+        """
+        if not text:
+            text = " "
+        font_paths = self.__font_chain(font_path)
+        fonts = [load_font(path, 54) for path in font_paths]
+        lines = text.splitlines()
+        lines_runs = [font_runs(line, font_paths) for line in lines]
+        longest_runs = lines_runs[lines.index(max(lines, key=len))]
+        text_right = 0.0
+        if longest_runs:
+            *first_runs, (last_font, last_run) = longest_runs
+            text_right = sum(
+                fonts[run_font].getlength(run) for run_font, run in first_runs
+            )
+            text_right += fonts[last_font].getbbox(last_run)[2]
+        return fonts, lines_runs, int(text_right) - 6, 54 * len(lines) - 1
+
+    def __font_chain(
+        self, font_path: str | BytesIO | list[str | BytesIO] | None
+    ) -> list[str | Path | BytesIO]:
+        """
+        :param font_path: Path to the font, a chain of fonts or None for the default font.
+        :return: Chain of fonts.
+        """
+        if font_path is None:
+            return [self.default_font_path]
+        if not isinstance(font_path, (list, tuple)):
+            return [font_path]
+        if not font_path:
+            raise ValueError("The chain of fonts is empty")
+        return list(font_path)
+
     def process_text_image(
         self,
         text_image: Image.Image,
@@ -277,13 +1473,44 @@ class GIF:
         :param direction: Direction.
         :return: Processed text image.
         """
+        text_cols, text_rows = text_image.size
+        left, top, right, bottom = self.text_padding(
+            text_image.size, intro, outro, direction
+        )
+        image = Image.new(
+            mode="RGB",
+            size=(left + text_cols + right, top + text_rows + bottom),
+            color="#FFFFFF",
+        )
+        image.paste(text_image, (left, top))
+        if self.debug:
+            now_fragment_index = len(self._fragments)
+            image.save(self.debug_path.format(fragment_index=now_fragment_index))
+        return image
+
+    def text_padding(
+        self,
+        text_size: tuple[int, int],
+        intro: bool = True,
+        outro: bool = True,
+        direction: str | Literal["left", "right", "up", "down", "none"] = "left",
+    ) -> tuple[int, int, int, int]:
+        """
+        The blank space `process_text_image` adds around the text.
+
+        :param text_size: Size of the image with text.
+        :param intro: Do you want the image to extend beyond the screen?
+        :param outro: Do you want the image to extend beyond the screen?
+        :param direction: Direction.
+        :return: (left, top, right, bottom)
+        """
         direction = direction.lower()
         if direction not in ("left", "right", "up", "down", "none"):
             raise ValueError(
                 f'direction can only be one of "left", "right", '
                 f'"up", "down", or "none". Not "{direction}".'
             )
-        text_cols, text_rows = text_image.size
+        text_cols, text_rows = text_size
         new_image_cols, new_image_rows = text_cols, text_rows
         paste_col, paste_row = 0, 0
 
@@ -330,16 +1557,12 @@ class GIF:
         if new_image_rows < self.rows:
             new_image_rows = self.rows
 
-        image = Image.new(
-            mode="RGB",
-            size=(new_image_cols, new_image_rows),
-            color="#FFFFFF",
+        return (
+            paste_col,
+            paste_row,
+            new_image_cols - text_cols - paste_col,
+            new_image_rows - text_rows - paste_row,
         )
-        image.paste(text_image, (paste_col, paste_row))
-        if self.debug:
-            now_fragment_index = len(self._fragments)
-            image.save(self.debug_path.format(fragment_index=now_fragment_index))
-        return image
 
     @staticmethod
     def extract_gif_frames(
@@ -366,35 +1589,171 @@ class GIF:
         else:
             raise ValueError("Wrong type")
 
-        while True:
-            if frame_index % speed != 0:
+        try:
+            while True:
+                if frame_index % speed != 0:
+                    frame_index += 1
+                    continue
+                try:
+                    gif.seek(frame_index)
+                    yield gif.copy(), (
+                        duration
+                        if duration is not None
+                        else gif.info.get("duration", 0)
+                    )
+                except EOFError:
+                    break
                 frame_index += 1
-                continue
-            try:
-                gif.seek(frame_index)
-                yield gif.copy(), (
-                    duration if duration is not None else gif.info.get("duration", 0)
+        finally:
+            # The files opened from a path are closed, the caller's BytesIO is kept open
+            if isinstance(gif_file, str):
+                gif.close()
+
+    def extract_gif_leds(
+        self,
+        gif_file: Image.Image | BytesIO | str,
+        *,
+        duration: int | None = None,
+        speed: int = 1,
+        strict: bool = False,
+    ) -> Generator[tuple[bytes, int], Any, None]:
+        """
+        The same as `extract_gif_frames`, but the frames are turned into LED states
+        instead of being copied. The gif must have the same size as the current one.
+        Each LED is read from one dark pixel of its cell and is on
+        if it is closer to "color_pixel_on_dark" than to "color_pixel_off_dark".
+
+        :param gif_file: GIF
+        :param duration: The speed of each frame within this fragment in milliseconds.
+        :param speed: Allows you to adjust the speed by selecting every x frame. For example, `speed=2` takes every second frame
+        :param strict: Raise ValueError if a frame is not exactly what `generate_led_frame` draws with the current `color_config`.
+        :return: Generator (LEDs, duration).
+        """
+        gif: Image.Image
+
+        if isinstance(gif_file, (str, BytesIO)):
+            gif = Image.open(gif_file)
+        elif isinstance(gif_file, Image.Image):
+            gif = gif_file
+        else:
+            raise ValueError("Wrong type")
+
+        try:
+            self.__check_gif_size(gif)
+            durations: list[int] | None = None
+            if not isinstance(gif_file, Image.Image) or getattr(
+                gif_file, "filename", None
+            ):
+                durations = gif_durations(gif_file)
+            # Without a file, the frames can only be counted by decoding them.
+            frame_indexes: Iterable[int] = (
+                itertools.count(0, speed)
+                if durations is None
+                else range(0, len(durations), speed)
+            )
+
+            dark = self.__leds_sampler("dark", (7, 7))
+            light = self.__leds_sampler("light", (6, 6))
+            for frame_index in frame_indexes:
+                try:
+                    gif.seek(frame_index)
+                except EOFError:
+                    break
+
+                leds, exact = dark(gif)
+                if strict and (
+                    not exact
+                    or light(gif) != (leds, True)
+                    or (
+                        frame_index == 0
+                        and self.generate_led_frame(leds).tobytes()
+                        != gif.convert("RGBA").tobytes()
+                    )
+                ):
+                    raise ValueError(
+                        f"Frame {frame_index} of this gif is not an LED frame "
+                        f"with the current color_config"
+                    )
+                yield leds, (
+                    duration
+                    if duration is not None
+                    else (
+                        gif.info.get("duration", 0)
+                        if durations is None
+                        else durations[frame_index]
+                    )
                 )
-            except EOFError:
-                break
-            frame_index += 1
+        finally:
+            # The files opened from a path are closed, the caller's BytesIO is kept open
+            if isinstance(gif_file, str):
+                gif.close()
+
+    def __leds_sampler(
+        self, shade: Literal["dark", "light"], offset: tuple[int, int]
+    ) -> Callable[[Image.Image], tuple[bytes, bool]]:
+        """
+        Reads one pixel of the given shade from every LED cell.
+
+        :param shade: "dark" or "light".
+        :param offset: Position of the first cell at `scale` 1.
+        :return: Function that returns the LEDs of a frame
+        and whether every pixel was exactly the off or the on color.
+        """
+        off = ImageColor.getrgb(self.color_config[f"color_pixel_off_{shade}"])[:3]
+        on = ImageColor.getrgb(self.color_config[f"color_pixel_on_{shade}"])[:3]
+        palette = Image.new("P", (1, 1))
+        palette.putpalette(off + on)
+        cell = self.scale * 3
+        box = (
+            offset[0] * self.scale,
+            offset[1] * self.scale,
+            offset[0] * self.scale + self.columns * cell,
+            offset[1] * self.scale + self.rows * cell,
+        )
+
+        def sample(frame: Image.Image) -> tuple[bytes, bool]:
+            cells = frame.resize(
+                (self.columns, self.rows), Image.Resampling.NEAREST, box=box
+            ).convert("RGB")
+            colors = cells.getcolors(2)
+            exact = colors is not None and all(
+                color in (off, on) for _, color in colors
+            )
+            leds = cells.quantize(palette=palette, dither=Image.Dither.NONE)
+            return leds.tobytes().translate(_index_to_leds), exact
+
+        return sample
 
     def add_image_fragment(
         self,
-        image_path: Image.Image | str,
+        image_path: Image.Image | str | Buffer,
         *,
         duration: int = 20,
         speed: int = 1,
         direction: str | Literal["left", "right", "up", "down", "none"] = "left",
+        substeps: int = 1,
+        levels: int = 2,
         repeat: int = 1,
+        index: int | None = None,
+        budget: FrameBudget | None = None,
     ):
         """
 
         :param image_path: Image file or path to it. `Image.open(image_path)`
+            Or a NumPy array or another object with the buffer protocol of uint8 pixels, see `_buffer_image`.
+            A stack of frames is shown frame by frame, every frame is the size of the gif in LEDs.
+            The array is thresholded into LEDs right away, it can be changed after this call.
         :param duration: The speed of each frame within this fragment in milliseconds. For example, `speed=2` takes every second frame.
         :param speed: Allows you to adjust the speed by selecting every x frame. For example, `speed=2` takes every second frame.
         :param direction: The direction of the image movement.
+        :param substeps: Number of frames for the movement by one LED, the LEDs between two positions are dimmed.
+            The image moves smoothly at the speed of `duration * substeps` milliseconds per LED.
+        :param levels: Number of brightness levels of the LEDs.
+            2 - only black pixels are on, with more levels the darker the pixel, the brighter the LED.
         :param repeat: Number of times this fragment is repeated.
+        :param index: Position of the fragment, at the end by default.
+        :param budget: Limits of the frames of the fragment with its repetitions.
+            `speed` and `duration` are multiplied so that the frames fit, the image moves at the same speed.
         :return: Fragment index.
         """
         direction = direction.lower()
@@ -404,18 +1763,108 @@ class GIF:
                 f'"up", "down", or "none". Not "{direction}".'
             )
 
+        if substeps < 1:
+            raise ValueError("substeps must be greater than or equal to 1")
+
+        if not 2 <= levels <= 256:
+            raise ValueError("levels must be between 2 and 256")
+
         if repeat < 1:
             raise ValueError("repeat must be greater than or equal to 1")
 
-        image: Image.Image
+        frames_count = 1
+        if isinstance(image_path, Image.Image):
+            self.__check_image_size(image_path)
+        elif not isinstance(image_path, str):
+            try:
+                memoryview(image_path)
+            except TypeError:
+                raise ValueError("Wrong type") from None
+            array_image, frames_count = _buffer_image(image_path)
+            if frames_count == 1:
+                self.__check_image_size(array_image)
+            elif array_image.size != (self.columns, self.rows * frames_count):
+                raise ValueError(
+                    f"The size of the frames does not match the size of the current gif "
+                    f"({array_image.width}, {array_image.height // frames_count}) "
+                    f"!= ({self.columns}, {self.rows})"
+                )
+            # The array can be reused after this call, so the LEDs are taken now.
+            # They are kept as a grayscale array of dark pixels, thresholding it again gives the same LEDs.
+            rows = array_image.height // frames_count
+            image_path = memoryview(
+                ImageChops.invert(self.__leds_image(array_image, levels)).tobytes()
+            ).cast(
+                "B",
+                (
+                    (frames_count, rows, array_image.width)
+                    if frames_count > 1
+                    else (rows, array_image.width)
+                ),
+            )
+            array_image, _ = _buffer_image(image_path)
+
+        if budget is not None:
+            plan = self.__frames_plan(
+                dict(
+                    type="image",
+                    image_path=image_path,
+                    speed=speed,
+                    direction=direction,
+                    substeps=substeps,
+                )
+            )
+            factor = self.__budget_factor(budget, lambda factor: plan(factor) * repeat)
+            speed *= factor
+            duration *= factor
 
-        if isinstance(image_path, str):
-            image = Image.open(image_path)
-        elif isinstance(image_path, Image.Image):
-            image = image_path
-        else:
-            raise ValueError("Wrong type")
+        def build() -> tuple[list[bytes] | list[memoryview], list[int]]:
+            image: Image.Image
+            if isinstance(image_path, str):
+                image = Image.open(image_path)
+                self.__check_image_size(image)
+            elif isinstance(image_path, Image.Image):
+                image = image_path
+            else:
+                image = array_image
+
+            if frames_count > 1:
+                # All the frames are thresholded at once,
+                # and the LED frames are parts of the one result.
+                leds = memoryview(self.__leds_image(image, levels).tobytes())
+                size = self.columns * self.rows
+                frames = []
+                for start in range(0, len(leds), size * speed):
+                    end = start + size
+                    frames.append(leds[start:end])
+                return frames, [duration] * len(frames)
+
+            leds_frames = self.image_leds_frames(
+                image,
+                direction=direction,
+                speed=speed,
+                substeps=substeps,
+                levels=levels,
+            )
+            return leds_frames, [duration] * len(leds_frames)
 
+        return self._add_fragment(
+            Fragment(
+                build,
+                repeat=repeat,
+                frame_store=self.frame_store,
+                type="image",
+                image_path=image_path,
+                duration=duration,
+                speed=speed,
+                direction=direction,
+                substeps=substeps,
+                levels=levels,
+            ),
+            index,
+        )
+
+    def __check_image_size(self, image: Image.Image) -> None:
         columns, rows = image.size
         if (columns, rows) < (self.columns, self.rows):
             raise ValueError(
@@ -424,6 +1873,42 @@ class GIF:
                 f"{image}"
             )
 
+    def image_leds_frames(
+        self,
+        image: Image.Image,
+        *,
+        speed: int = 1,
+        direction: str | Literal["left", "right", "up", "down", "none"] = "left",
+        wrap: bool = False,
+        substeps: int = 1,
+        levels: int = 2,
+        padding: tuple[int, int, int, int] = (0, 0, 0, 0),
+    ) -> list[bytes]:
+        """
+        LED states of each frame of the image movement.
+
+        :param image: Image. Black pixels are on.
+        :param speed: Allows you to adjust the speed by selecting every x frame. For example, `speed=2` takes every second frame.
+            With `substeps` it is counted in substeps.
+        :param direction: The direction of the image movement.
+        :param wrap: The image is a loop: what leaves the screen on one side comes back on the other.
+            The frames are one turn of the loop.
+        :param substeps: Number of frames for the movement by one LED.
+            The frames between two positions light the LEDs partly, as if the image was between them.
+        :param levels: Number of brightness levels of the LEDs.
+            2 - only black pixels are on, with more levels the darker the pixel, the brighter the LED.
+        :param padding: (left, top, right, bottom) - off LEDs around the image, see `text_padding`.
+            They are read as off where the frames reach them, the padded image is not made.
+        :return: `columns * rows` bytes per frame. 0 - off, 255 - on, the values between are dimmed.
+        """
+        if substeps < 1:
+            raise ValueError("substeps must be greater than or equal to 1")
+        if not 2 <= levels <= 256:
+            raise ValueError("levels must be between 2 and 256")
+
+        left, top, right, bottom = padding
+        image_columns, image_rows = image.size
+        columns, rows = left + image_columns + right, top + image_rows + bottom
         if direction in ("left", "right"):
             count = columns - self.columns or 1
         elif direction in ("up", "down"):
@@ -431,7 +1916,31 @@ class GIF:
         else:
             count = 1
 
-        def check_pixel(n: int):
+        leds_image = self.__leds_image(image, levels)
+        if wrap and direction in ("left", "right", "up", "down"):
+            if any(padding):
+                leds_image = leds_image.crop(
+                    (-left, -top, image_columns + right, image_rows + bottom)
+                )
+            return self.__wrapped_leds_frames(leds_image, speed, direction, substeps)
+
+        if direction in ("left", "right"):
+            moving = columns > self.columns
+        else:
+            moving = direction in ("up", "down") and rows > self.rows
+        if not moving:
+            # There is no next position to move to
+            substeps = 1
+        elif substeps > 1:
+            # The moved copies take off LEDs from the padding at the edges
+            leds_image = leds_image.crop((-1, -1, image_columns + 1, image_rows + 1))
+            left -= 1
+            top -= 1
+        shifted = self.__substep_images(leds_image, direction, substeps)
+
+        frames = []
+        for position in range(0, count * substeps, speed):
+            n, substep = divmod(position, substeps)
             match direction:
                 case "left":
                     start_col, start_row = n, 0
@@ -444,51 +1953,186 @@ class GIF:
                 case _:
                     start_col, start_row = 0, 0
 
-            def func(c: int, r: int) -> bool:
-                c += start_col
-                r += start_row
-                pixel = image.getpixel((c, r))
-                if (
-                    c < 0
-                    or r < 0
-                    or not pixel
-                    or isinstance(pixel, float)
-                    or pixel[:3] != (0, 0, 0)
-                ):
-                    return False
-                return True
+            # Outside the image the crop is filled with off LEDs
+            start_col -= left
+            start_row -= top
+            frames.append(
+                shifted[substep]
+                .crop(
+                    (
+                        start_col,
+                        start_row,
+                        start_col + self.columns,
+                        start_row + self.rows,
+                    )
+                )
+                .tobytes()
+            )
+        return frames
 
-            return func
+    def leds_frames_count(
+        self,
+        size: tuple[int, int],
+        *,
+        speed: int = 1,
+        direction: str | Literal["left", "right", "up", "down", "none"] = "left",
+        wrap: bool = False,
+        substeps: int = 1,
+        padding: tuple[int, int, int, int] = (0, 0, 0, 0),
+    ) -> int:
+        """
+        The number of frames of `image_leds_frames` for an image of this size.
+        The image is not needed.
 
-        frames_count = len(range(0, count, speed))
-        frames = (
-            frame
-            for generator in itertools.tee(
-                (
-                    self.generate_frame(func=check_pixel(n))
-                    for n in range(0, count, speed)
-                ),
-                repeat,
+        :param size: Size of the image.
+        :param speed: Allows you to adjust the speed by selecting every x frame. For example, `speed=2` takes every second frame.
+        :param direction: The direction of the image movement.
+        :param wrap: The image is a loop.
+        :param substeps: Number of frames for the movement by one LED.
+        :param padding: (left, top, right, bottom) - off LEDs around the image.
+        :return: Number of frames.
+        """
+        left, top, right, bottom = padding
+        columns, rows = left + size[0] + right, top + size[1] + bottom
+        if wrap and direction in ("left", "right", "up", "down"):
+            period = columns if direction in ("left", "right") else rows
+            return len(range(0, period * substeps, speed))
+
+        if direction in ("left", "right"):
+            count, moving = columns - self.columns or 1, columns > self.columns
+        elif direction in ("up", "down"):
+            count, moving = rows - self.rows or 1, rows > self.rows
+        else:
+            count, moving = 1, False
+        return len(range(0, count * (substeps if moving else 1), speed))
+
+    @staticmethod
+    def __leds_image(image: Image.Image, levels: int) -> Image.Image:
+        """
+        The LEDs of each pixel of the image, see `image_leds_frames`.
+
+        :param image: Image. Black pixels are on.
+        :param levels: Number of brightness levels of the LEDs.
+        :return: "L" image. 0 - off, 255 - on, the values between are dimmed.
+        """
+        if levels == 2 and image.mode == "L":
+            return image.point([255] + [0] * 255)
+        if levels == 2:
+            red, green, blue = (
+                image.convert("RGB")
+                .point(lambda value: 255 if value == 0 else 0)
+                .split()
             )
-            for frame in generator
+            return ImageChops.darker(ImageChops.darker(red, green), blue)
+        # The whole image is thresholded at once with a lookup table
+        steps = levels - 1
+        return image.convert("L").point(
+            [
+                round(round((255 - value) * steps / 255) * 255 / steps)
+                for value in range(256)
+            ]
         )
 
-        durations = (duration for _ in range(repeat) for _ in range(frames_count))
-        now_fragment_index = len(self._fragments)
-        self._fragments.append((frames, durations, frames_count * repeat))
-        return now_fragment_index
+    def __wrapped_leds_frames(
+        self, leds_image: Image.Image, speed: int, direction: str, substeps: int
+    ) -> list[bytes]:
+        """
+        The frames of `image_leds_frames(..., wrap=True)`.
+        The image is repeated until every position of the screen fits into it,
+        and the frames are cut from the copy at the position modulo the period.
+
+        :param leds_image: "L" image of the LEDs.
+        :param speed: Step of the movement in substeps.
+        :param direction: "left", "right", "up" or "down".
+        :param substeps: Number of frames for the movement by one LED.
+        :return: `columns * rows` bytes per frame.
+        """
+        columns, rows = leds_image.size
+        horizontal = direction in ("left", "right")
+        period, screen = (columns, self.columns) if horizontal else (rows, self.rows)
+        tiles = -(-(period + screen) // period)
+
+        tiled = Image.new(
+            "L", (columns * tiles, rows) if horizontal else (columns, rows * tiles)
+        )
+        for tile in range(tiles):
+            tiled.paste(
+                leds_image, (tile * columns, 0) if horizontal else (0, tile * rows)
+            )
+        # The copy is periodic, so the shifted copies wrap around correctly
+        shifted = self.__substep_images(tiled, direction, substeps)
+
+        frames = []
+        for position in range(0, period * substeps, speed):
+            n, substep = divmod(position, substeps)
+            offset = n if direction in ("left", "up") else -n % period
+            start_col, start_row = (offset, 0) if horizontal else (0, offset)
+            frames.append(
+                shifted[substep]
+                .crop(
+                    (
+                        start_col,
+                        start_row,
+                        start_col + self.columns,
+                        start_row + self.rows,
+                    )
+                )
+                .tobytes()
+            )
+        return frames
+
+    @staticmethod
+    def __substep_images(
+        leds_image: Image.Image, direction: str, substeps: int
+    ) -> list[Image.Image]:
+        """
+        The image and its copies moved by a part of the LED in the direction of the movement.
+        They are computed once for the whole image, and the frames are cut from them.
+
+        :param leds_image: "L" image of the LEDs.
+        :param direction: The direction of the movement.
+        :param substeps: Number of frames for the movement by one LED.
+        :return: `substeps` images, the image itself is the first one.
+        """
+        images = [leds_image]
+        if substeps == 1 or direction not in ("left", "right", "up", "down"):
+            return images * substeps
+
+        step = {"left": (-1, 0), "right": (1, 0), "up": (0, -1), "down": (0, 1)}
+        # The next whole position: each LED takes the state of its neighbour
+        next_image = ImageChops.offset(leds_image, *step[direction])
+        for substep in range(1, substeps):
+            images.append(Image.blend(leds_image, next_image, substep / substeps))
+        return images
+
+    def _add_fragment(self, fragment: "Fragment", index: int | None = None) -> int:
+        if self.debug:
+            # Debug images are saved with the index of the fragment being added.
+            fragment.realize()
+        if index is None:
+            index = len(self._fragments)
+        elif not -len(self._fragments) <= index <= len(self._fragments):
+            raise ValueError(f"Fragment index out of range: {index}")
+        elif index < 0:
+            index += len(self._fragments)
+        self._fragments.insert(index, fragment)
+        return index
 
     def add_text_fragment(
         self,
         text: str,
         *,
-        font_path: str | BytesIO | None = None,
+        font_path: str | BytesIO | list[str | BytesIO] | None = None,
         duration: int = 20,
         speed: int = 1,
         intro: bool = True,
         outro: bool = True,
         direction: str | Literal["left", "right", "up", "down", "none"] = "left",
+        wrap: bool = False,
+        substeps: int = 1,
         repeat: int = 1,
+        index: int | None = None,
+        budget: FrameBudget | None = None,
     ) -> int:
         """
 
@@ -496,10 +2140,18 @@ class GIF:
         :param duration: The speed of each frame within this fragment in milliseconds
         :param speed: Allows you to adjust the speed by selecting every x frame. For example, `speed=2` takes every second frame.
         :param font_path: The path to the font. A pixel font with 9 pixel height letters.
+            Or a chain of fonts, each character is drawn with the first font that has it.
         :param intro: Whether to fade the text onto the screen.
         :param outro: Whether to fade the text off the screen.
         :param direction: The direction of the text movement.
+        :param wrap: Scroll the text in a loop without a blank screen between the turns.
+            The fragment is one turn, `intro` and `outro` are not used. Use `repeat` or `loop` to scroll it endlessly.
+        :param substeps: Number of frames for the movement by one LED, the LEDs between two positions are dimmed.
+            The text moves smoothly at the speed of `duration * substeps` milliseconds per LED.
         :param repeat: Number of times this fragment is repeated.
+        :param index: Position of the fragment, at the end by default.
+        :param budget: Limits of the frames of the fragment with its repetitions.
+            `speed` and `duration` are multiplied so that the frames fit, the text moves at the same speed.
         :return: Fragment index.
         """
         direction = direction.lower()
@@ -509,17 +2161,93 @@ class GIF:
                 f'"up", "down", or "none". Not "{direction}".'
             )
 
+        if substeps < 1:
+            raise ValueError("substeps must be greater than or equal to 1")
+
         if repeat < 1:
             raise ValueError("repeat must be greater than or equal to 1")
 
-        text_img = self.generate_text_image(text, font_path)
-        image = self.process_text_image(text_img, intro, outro, direction)
-        return self.add_image_fragment(
-            image,
-            duration=duration,
-            speed=speed,
-            direction=direction,
-            repeat=repeat,
+        if budget is not None:
+            plan = self.__frames_plan(
+                dict(
+                    type="text",
+                    text=text,
+                    font_path=font_path,
+                    speed=speed,
+                    intro=intro,
+                    outro=outro,
+                    direction=direction,
+                    wrap=wrap,
+                    substeps=substeps,
+                )
+            )
+            factor = self.__budget_factor(budget, lambda factor: plan(factor) * repeat)
+            speed *= factor
+            duration *= factor
+
+        def build() -> tuple[list[bytes], list[int]]:
+            key = None
+            leds_frames = None
+            if self.cache is not None:
+                key = self.cache.key(
+                    type="text",
+                    text=text,
+                    font=(
+                        font_digest(
+                            self.default_font_path if font_path is None else font_path
+                        )
+                        if not isinstance(font_path, (list, tuple))
+                        else [font_digest(path) for path in font_path]
+                    ),
+                    speed=speed,
+                    intro=intro,
+                    outro=outro,
+                    direction=direction,
+                    wrap=wrap,
+                    substeps=substeps,
+                    columns=self.columns,
+                    rows=self.rows,
+                )
+                leds_frames = self.cache.get(key, self.columns, self.rows)
+
+            if leds_frames is None:
+                text_img = self.generate_text_image(text, font_path)
+                if self.debug:
+                    # The padded image is only made for the debug image
+                    self.process_text_image(
+                        text_img, intro and not wrap, outro and not wrap, direction
+                    )
+                leds_frames = self.image_leds_frames(
+                    text_img,
+                    speed=speed,
+                    direction=direction,
+                    wrap=wrap,
+                    substeps=substeps,
+                    padding=self.text_padding(
+                        text_img.size, intro and not wrap, outro and not wrap, direction
+                    ),
+                )
+                if self.cache is not None and key is not None:
+                    self.cache.put(key, self.columns, self.rows, leds_frames)
+            return leds_frames, [duration] * len(leds_frames)
+
+        return self._add_fragment(
+            Fragment(
+                build,
+                repeat=repeat,
+                frame_store=self.frame_store,
+                type="text",
+                text=text,
+                font_path=font_path,
+                duration=duration,
+                speed=speed,
+                intro=intro,
+                outro=outro,
+                direction=direction,
+                wrap=wrap,
+                substeps=substeps,
+            ),
+            index,
         )
 
     def add_gif_fragment(
@@ -529,6 +2257,7 @@ class GIF:
         duration: int | None = None,
         speed: int = 1,
         repeat: int = 1,
+        index: int | None = None,
     ) -> int:
         """
 
@@ -536,63 +2265,449 @@ class GIF:
         :param duration: The speed of each frame within this fragment in milliseconds.
         :param speed: Allows you to adjust the speed by selecting every x frame. For example, `speed=2` takes every second frame.
         :param repeat: Number of times this fragment is repeated.
+        :param index: Position of the fragment, at the end by default.
         :return: Fragment index.
         """
         if repeat < 1:
             raise ValueError("repeat must be greater than or equal to 1")
 
-        gif_file: Image.Image
-
-        if isinstance(gif_path, (str, BytesIO)):
-            gif_file = Image.open(gif_path)
+        if isinstance(gif_path, BytesIO):
+            # The file can be closed before the fragment is built.
+            gif_path = BytesIO(gif_path.read())
         elif isinstance(gif_path, Image.Image):
-            gif_file = gif_path
-        else:
+            self.__check_gif_size(gif_path)
+        elif not isinstance(gif_path, str):
             raise ValueError("Wrong type")
 
-        columns, rows = gif_file.size
-        if (columns, rows) != (self.columns_pixels, self.rows_pixels):
-            raise ValueError(
-                f"The size of this gif does not match the size of the current gif "
-                f"({columns}, {rows}) != ({self.columns_pixels}, {self.rows_pixels})"
-                f"{gif_file}"
-            )
+        def build() -> tuple[list[bytes] | list[Image.Image], list[int]]:
+            return self.__read_gif(gif_path, duration=duration, speed=speed)
 
-        frames = []
-        durations = []
-        for frame, duration_ in self.extract_gif_frames(
-            gif_file, duration=duration, speed=speed
-        ):
-            frames.append(frame)
-            durations.append(duration_)
+        return self._add_fragment(
+            Fragment(
+                build,
+                repeat=repeat,
+                frame_store=self.frame_store,
+                type="gif",
+                gif_path=gif_path,
+                duration=duration,
+                speed=speed,
+            ),
+            index,
+        )
 
-        frames *= repeat
-        durations *= repeat
-        frames_count = len(frames)
+    def add_zones_fragment(
+        self,
+        zones: list[tuple[int, int, GIF]],
+        *,
+        repeat: int = 1,
+        index: int | None = None,
+    ) -> int:
+        """
+        Fragment of several regions of the screen, each one with its own fragments,
+        for example a label, a clock and a running text side by side.
+        The frame changes when a frame of some region changes,
+        and only the regions that changed are copied into it, so a region that does not change costs nothing.
+        The fragment lasts as long as the longest region, the shorter ones keep their last frame.
 
-        now_fragment_index = len(self._fragments)
-        self._fragments.append((frames, durations, frames_count))
-        return now_fragment_index
+        :param zones: (column, row, gif) - the top left LED of the region and a GIF of the size of the region
+            with its fragments. The colors of the current gif are used.
+            The regions that come later are drawn over the earlier ones.
+        :param repeat: Number of times this fragment is repeated.
+        :param index: Position of the fragment, at the end by default.
+        :return: Fragment index.
+        """
+        if repeat < 1:
+            raise ValueError("repeat must be greater than or equal to 1")
+        if not zones:
+            raise ValueError("You have not added any zones")
 
-    def clear_fragments(self) -> None:
-        self._fragments.clear()
+        layout: list[tuple[int, int, int, int, list[Fragment]]] = []
+        for column, row, zone in zones:
+            if (
+                column < 0
+                or row < 0
+                or column + zone.columns > self.columns
+                or row + zone.rows > self.rows
+            ):
+                raise ValueError(
+                    f"The zone ({column}, {row}, {zone.columns}, {zone.rows}) "
+                    f"does not fit into the current gif ({self.columns}, {self.rows})"
+                )
+            if not zone._fragments:
+                raise ValueError(f"The zone ({column}, {row}) has no fragments")
+            # The fragments the zone has now, later changes of the zone are not seen
+            layout.append((column, row, zone.columns, zone.rows, list(zone._fragments)))
 
-    def remove_fragment(self, index: int) -> None:
-        self._fragments.pop(index)
+        def build() -> tuple[list[bytes], list[int]]:
+            return self.__compose_zones(layout)
 
-    def save(
-        self,
-        path: str | bytes | PathLike[str] | PathLike[bytes] | BytesIO | None = None,
-        loop: int | None = None,
-    ) -> None:
+        return self._add_fragment(
+            Fragment(
+                build,
+                repeat=repeat,
+                frame_store=self.frame_store,
+                type="zones",
+                zones=[
+                    (column, row, fragments) for column, row, *_, fragments in layout
+                ],
+            ),
+            index,
+        )
+
+    def __compose_zones(
+        self, layout: list[tuple[int, int, int, int, list[Fragment]]]
+    ) -> tuple[list[bytes], list[int]]:
+        """
+        The frames of `add_zones_fragment`.
+
+        :param layout: (column, row, columns, rows, fragments) of each zone.
+        :return: (frames, durations)
+        """
+        from bisect import bisect_right
+
+        timelines = []
+        for *_, fragments in layout:
+            frames: list[bytes | memoryview] = []
+            for fragment in fragments:
+                for frame in fragment.frames():
+                    if isinstance(frame, Image.Image):
+                        raise ValueError(
+                            "The frames of a zone must be LED frames, not images"
+                        )
+                    frames.append(frame)
+            durations = [
+                duration for fragment in fragments for duration in fragment.durations()
+            ]
+            timelines.append((frames, list(itertools.accumulate(durations, initial=0))))
+
+        total = max(starts[-1] for _, starts in timelines)
+        # The moments when some zone changes its frame
+        times = sorted(
+            {start for _, starts in timelines for start in starts if start < total}
+        ) or [0]
+
+        board = bytearray(self.columns * self.rows)
+        shown = [-1] * len(layout)
+        leds_frames: list[bytes] = []
+        frames_durations: list[int] = []
+        for start, end in zip(times, times[1:] + [total]):
+            drawn: list[tuple[int, int, int, int]] = []
+            for number, (column, row, columns, rows, _) in enumerate(layout):
+                frames, starts = timelines[number]
+                frame_index = min(bisect_right(starts, start), len(frames)) - 1
+                covered = any(
+                    column < right
+                    and left < column + columns
+                    and row < bottom
+                    and top < row + rows
+                    for left, top, right, bottom in drawn
+                )
+                if frame_index == shown[number] and not covered:
+                    continue
+                shown[number] = frame_index
+                drawn.append((column, row, column + columns, row + rows))
+
+                leds = frames[frame_index]
+                for line in range(rows):
+                    board_start = (row + line) * self.columns + column
+                    board_end = board_start + columns
+                    zone_start = line * columns
+                    zone_end = zone_start + columns
+                    board[board_start:board_end] = leds[zone_start:zone_end]
+
+            if leds_frames and not drawn:
+                frames_durations[-1] += end - start
+            else:
+                leds_frames.append(bytes(board))
+                frames_durations.append(end - start)
+        return leds_frames, frames_durations
+
+    def __read_gif(
+        self,
+        gif_path: Image.Image | BytesIO | str,
+        *,
+        duration: int | None,
+        speed: int,
+    ) -> tuple[list[bytes] | list[Image.Image], list[int]]:
+        """
+        Reads the gif as LED states if it was drawn with the current `color_config`,
+        otherwise as images.
+
+        :param gif_path: Gif file or path to it. `Image.open(gif_path)`
+        :param duration: The speed of each frame within this fragment in milliseconds.
+        :param speed: Allows you to adjust the speed by selecting every x frame.
+        :return: Frames and durations.
+        """
+
+        def source() -> Image.Image | BytesIO | str:
+            # Each reader gets its own file position.
+            if isinstance(gif_path, BytesIO):
+                return BytesIO(gif_path.getvalue())
+            return gif_path
+
+        gif_file = source()
+        if isinstance(gif_file, Image.Image):
+            self.__check_gif_size(gif_file)
+        else:
+            with Image.open(gif_file) as image:
+                self.__check_gif_size(image)
+
+        leds_frames: list[bytes] = []
+        durations: list[int] = []
+        try:
+            for leds, duration_ in self.extract_gif_leds(
+                source(), duration=duration, speed=speed, strict=True
+            ):
+                leds_frames.append(leds)
+                durations.append(duration_)
+            return leds_frames, durations
+        except ValueError:
+            durations.clear()
+
+        frames: list[Image.Image] = []
+
+        for frame, duration_ in self.extract_gif_frames(
+            source(), duration=duration, speed=speed
+        ):
+            frames.append(frame)
+            durations.append(duration_)
+        return frames, durations
+
+    def __check_gif_size(self, gif_file: Image.Image) -> None:
+        columns, rows = gif_file.size
+        if (columns, rows) != (self.columns_pixels, self.rows_pixels):
+            raise ValueError(
+                f"The size of this gif does not match the size of the current gif "
+                f"({columns}, {rows}) != ({self.columns_pixels}, {self.rows_pixels})"
+                f"{gif_file}"
+            )
+
+    def clear_fragments(self) -> None:
+        self._fragments.clear()
+        self.__encoded_key = None
+        self.__encoded.clear()
+        self.__fragment_blocks.clear()
+
+    def remove_fragment(self, index: int) -> None:
+        self._fragments.pop(index)
+
+    def estimate(self) -> tuple[int, int]:
+        """
+        The number of frames and the estimated size of the gif of the current fragments.
+        The text and image fragments that are not built yet are counted without drawing them.
+
+        :return: (frames, bytes)
+        """
+        frames = 0
+        for fragment in self._fragments:
+            if self.__plannable(fragment):
+                frames += self.__frames_plan(fragment.definition)(1) * fragment.repeat
+            else:
+                frames += len(fragment)
+        header, frame = self.frame_size_estimate()
+        return frames, header + frames * frame
+
+    def frame_size_estimate(self) -> tuple[int, int]:
+        """
+        The estimated size of a gif without frames and of one frame.
+        The frame is text moving by one LED, with the text over the whole screen,
+        encoded as `save(fast=True)` encodes it. It is encoded once for each size and `color_config`.
+
+        :return: (bytes of the gif without frames, bytes of a frame)
+        """
+        key = (self.columns, self.rows, self.scale, tuple(self.color_config.items()))
+        if key not in _frame_sizes:
+            sample = self.generate_text_image("Sample 0123 text, THE LEDS ")
+            screen = Image.new("RGB", (self.columns + 2, self.rows), "#FFFFFF")
+            for row in range(0, screen.height, sample.height):
+                for column in range(0, screen.width, sample.width):
+                    screen.paste(sample, (column, row))
+            first, second = self.image_leds_frames(screen)[:2]
+            _, (_, block) = self.encode_led_frames(
+                [(first, 0, None), (second, 0, None)]
+            )
+            header = _led_gif(
+                (self.columns_pixels, self.rows_pixels), self.led_palette(), 0, []
+            )
+            # The block of a frame follows the graphic control extension of 8 bytes
+            _frame_sizes[key] = len(header), len(block or b"") + 8
+        return _frame_sizes[key]
+
+    @staticmethod
+    def __plannable(fragment: Fragment) -> bool:
+        """
+        :return: Is it a text or an image fragment that is not built yet?
+        """
+        return not fragment.realized and fragment.definition.get("type") in (
+            "text",
+            "image",
+        )
+
+    def __frames_plan(self, definition: dict[str, Any]) -> Callable[[int], int]:
+        """
+        Counts the frames of a text or an image fragment without drawing it.
+
+        :param definition: Parameters of the fragment. `Fragment.definition`
+        :return: (x) -> number of frames of one repetition with `speed * x`.
+        """
+        speed = definition.get("speed", 1)
+        direction = definition.get("direction", "left")
+        substeps = definition.get("substeps", 1)
+        wrap = False
+        padding = (0, 0, 0, 0)
+        if definition.get("type") == "text":
+            wrap = definition.get("wrap", False)
+            size = self.text_image_size(definition["text"], definition.get("font_path"))
+            padding = self.text_padding(
+                size,
+                definition.get("intro", True) and not wrap,
+                definition.get("outro", True) and not wrap,
+                direction,
+            )
+        else:
+            image_path = definition["image_path"]
+            if isinstance(image_path, str):
+                with Image.open(image_path) as image:
+                    size = image.size
+            elif isinstance(image_path, Image.Image):
+                size = image_path.size
+            else:
+                array_image, frames_count = _buffer_image(image_path)
+                if frames_count > 1:
+                    return lambda factor: len(range(0, frames_count, speed * factor))
+                size = array_image.size
+
+        return lambda factor: self.leds_frames_count(
+            size,
+            speed=speed * factor,
+            direction=direction,
+            wrap=wrap,
+            substeps=substeps,
+            padding=padding,
+        )
+
+    def __budget_factor(self, budget: FrameBudget, frames: Callable[[int], int]) -> int:
+        """
+        The least x for which every x-th frame fits into the budget.
+
+        :param budget: Limits of the frames.
+        :param frames: (x) -> number of frames with every x-th frame.
+        :return: x
+        """
+        allowed = budget.max_frames
+        if budget.max_bytes is not None:
+            header, frame = self.frame_size_estimate()
+            by_size = (budget.max_bytes - header) // frame
+            allowed = by_size if allowed is None else min(allowed, by_size)
+        if allowed is None or frames(1) <= allowed:
+            return 1
+
+        # With a step this large, every fragment is one frame
+        high = 1 << 31
+        if frames(high) > allowed:
+            raise ValueError(
+                f"The frames do not fit into the budget: "
+                f"{frames(high)} are needed at least, {max(allowed, 0)} are allowed"
+            )
+        low = 1
+        while high - low > 1:
+            middle = (low + high) // 2
+            if frames(middle) <= allowed:
+                high = middle
+            else:
+                low = middle
+        return high
+
+    def __fit_budget(self, budget: FrameBudget) -> None:
+        """
+        Takes every x-th frame of the text and image fragments that are not built yet,
+        the same x for all of them, so that the gif fits into the budget.
+        The fragments are replaced with ones with `speed` and `duration` multiplied by x.
+
+        :param budget: Limits of the frames of the gif.
+        """
+        fixed = 0
+        plans: dict[int, Callable[[int], int]] = {}
+        for position, fragment in enumerate(self._fragments):
+            if self.__plannable(fragment):
+                plans[position] = self.__frames_plan(fragment.definition)
+            else:
+                fixed += len(fragment)
+
+        factor = self.__budget_factor(
+            budget,
+            lambda factor: fixed
+            + sum(
+                plan(factor) * self._fragments[position].repeat
+                for position, plan in plans.items()
+            ),
+        )
+        if factor == 1:
+            return
+        for position in plans:
+            fragment = self._fragments[position]
+            definition = dict(fragment.definition)
+            add: Callable[..., int] = (
+                self.add_text_fragment
+                if definition.pop("type") == "text"
+                else self.add_image_fragment
+            )
+            definition["speed"] *= factor
+            definition["duration"] *= factor
+            self.remove_fragment(position)
+            add(**definition, repeat=fragment.repeat, index=position)
+
+    def frame_image(self, frame: "Frame") -> Image.Image:
+        """
+
+        :param frame: Frame of a fragment. `Fragment.frames()`
+        :return: Frame image.
+        """
+        if isinstance(frame, Image.Image):
+            return frame
+        return self.generate_led_frame(frame)
+
+    def save(
+        self,
+        path: SavePath | list[SavePath] | None = None,
+        loop: int | None = None,
+        *,
+        clear: bool = True,
+        incremental: bool = False,
+        fast: bool = False,
+        workers: int | None = 0,
+        budget: FrameBudget | None = None,
+    ) -> None:
         """
         Creates a looping GIF from a list of images.
 
-        :param path: Path or file for GIF
+        :param path: Path or file for GIF. A list of them to write the same gif to each one.
+            Paths ending in ".png" or ".webp" are saved in these formats.
         :param loop: Looping gif. 0 for infinite loop.
+        :param clear: Remove the fragments after saving.
+            Kept fragments are not built again, and if nothing has changed,
+            the next save writes the already encoded file.
+        :param incremental: Encode each fragment of LED frames separately and keep the result,
+            so after adding, removing or replacing a fragment, the next save encodes only that fragment.
+            The frames are the same, but the file is not the one written without it.
+            Needs `clear=False`, the encoded fragments are removed together with the fragments.
+        :param fast: Encode the gif straight from the states of the LEDs with one palette,
+            only the LEDs that changed since the previous frame are written.
+            The frames are the same, but the file is not the one written without it.
+            Not used with `incremental` or if some frames are images.
+        :param workers: Number of processes encoding the parts of the gif with `fast`.
+            None for the number of CPUs, 0 - in this process.
+        :param budget: Limits of the frames of the gif. The text and image fragments that are not built yet
+            take every x-th frame, shown x times longer, so that the gif fits. See `estimate`.
         """
         if not self._fragments:
             raise ValueError("You have not added any fragments")
+        if incremental and clear:
+            raise ValueError(
+                "incremental needs clear=False, the encoded fragments are removed with the fragments"
+            )
+        if budget is not None:
+            self.__fit_budget(budget)
 
         save_path = self.save_path if path is None else path
         if save_path is None:
@@ -602,47 +2717,403 @@ class GIF:
         if loop < 0:
             raise ValueError("loop must be greater than or equal to 0")
 
-        frames: Generator[Image.Image, Any, None] = (
-            frame for fragment in self._fragments for frame in fragment[0]
+        sinks = list(save_path) if isinstance(save_path, list) else [save_path]
+        if not sinks:
+            raise ValueError("save_path should not be None")
+
+        # Building the fragments. The frames are drawn one by one while saving.
+        count = sum(len(fragment) for fragment in self._fragments)
+
+        if not count:
+            raise ValueError("You have not added any fragments")
+
+        formats = [self.__sink_format(sink) for sink in sinks]
+        name = ", ".join(
+            sink if isinstance(sink, str) else getattr(sink, "name", str(sink))
+            for sink in sinks
         )
 
-        durations: list[int] = [
-            duration
-            for fragment in self._fragments
-            for duration in (
-                (fragment[1] for _ in range(fragment[2]))
-                if isinstance(fragment[1], int)
-                else fragment[1]
+        def new_progress() -> Progress | None:
+            if not self.progress_bar:
+                return None
+            return Progress(
+                count,
+                progress_bar_sink if self.progress_bar is True else self.progress_bar,
+                name=name,
+                interval=self.progress_interval,
             )
+
+        key = (
+            tuple((fragment.id, fragment.repeat) for fragment in self._fragments),
+            tuple(self.color_config.items()),
+            self.columns,
+            self.rows,
+            self.scale,
+            loop,
+        )
+        if self.__encoded_key != key:
+            self.__encoded_key = key
+            self.__encoded.clear()
+        new_formats = [
+            image_format
+            for image_format in dict.fromkeys(formats)
+            if image_format not in self.__encoded
         ]
-        count = sum(fragment[2] for fragment in self._fragments)
+        if (incremental or fast) and "GIF" in new_formats:
+            data = (
+                self.__encode_incremental(loop)
+                if incremental
+                else self.__encode_leds(loop, workers, new_progress())
+            )
+            if data is not None:
+                self.__encoded["GIF"] = data
+                new_formats.remove("GIF")
 
-        if not count:
-            raise ValueError("You have not added any fragments")
+        if new_formats:
+            frames: Iterable[Frame] = (
+                frame for fragment in self._fragments for frame in fragment.frames()
+            )
+
+            durations: list[int] = [
+                duration
+                for fragment in self._fragments
+                for duration in fragment.durations()
+            ]
+
+            progress = new_progress()
+            if progress is not None:
+                progress.update(0)
+                frames = self.__counted(frames, progress)
+            if len(new_formats) > 1:
+                # One pass of building for all formats
+                frames = list(frames)
+
+            # A single sink is written directly, unless the result is kept.
+            direct = len(sinks) == 1 and clear
+            for image_format in new_formats:
+                file = sinks[0] if direct else BytesIO()
+                frames_iterator = (
+                    (
+                        frame
+                        if isinstance(frame, Image.Image)
+                        else self.__draw_leds(frame, image_format)
+                    )
+                    for frame in frames
+                )
+                first_frame = next(frames_iterator)
+                first_frame.save(
+                    fp=file,
+                    format=image_format,
+                    save_all=True,
+                    # Only the gif writer takes the frames one by one
+                    append_images=(
+                        frames_iterator
+                        if image_format == "GIF"
+                        else list(frames_iterator)
+                    ),
+                    duration=durations,
+                    loop=loop,
+                )
+                if not direct and isinstance(file, BytesIO):
+                    self.__encoded[image_format] = file.getvalue()
+
+        for sink, image_format in zip(sinks, formats):
+            if image_format not in self.__encoded:
+                continue
+            data = self.__encoded[image_format]
+            if isinstance(sink, BytesIO):
+                sink.write(data)
+            else:
+                with open(sink, "wb") as sink_file:
+                    sink_file.write(data)
+
+        if clear:
+            self.clear_fragments()
+
+    def __encode_incremental(self, loop: int) -> bytes | None:
+        """
+        Joins the encoded frames of the fragments into one gif.
+        Only the fragments that were not encoded by the previous call are encoded.
+
+        :param loop: Looping gif. 0 for infinite loop.
+        :return: Gif file or None if some fragment has frames that are images.
+        """
+        blocks_cache = {}
+        header = b""
+        blocks = []
+        for fragment in self._fragments:
+            key = (
+                fragment.id,
+                self.columns,
+                self.rows,
+                self.scale,
+                tuple(self.color_config.items()),
+                loop,
+            )
+            if key not in self.__fragment_blocks:
+                # One repetition, the first frame of each is a full frame
+                count = len(fragment) // fragment.repeat
+                if not count:
+                    continue
+                leds_frames = list(itertools.islice(fragment.frames(), count))
+                if any(isinstance(leds, Image.Image) for leds in leds_frames):
+                    return None
+                frames = [
+                    self.generate_led_palette_frame(leds)  # type: ignore[arg-type]
+                    for leds in leds_frames
+                ]
+                file = BytesIO()
+                frames[0].save(
+                    fp=file,
+                    format="GIF",
+                    save_all=True,
+                    append_images=frames[1:],
+                    duration=list(itertools.islice(fragment.durations(), count)),
+                    loop=loop,
+                    transparency=0,
+                    # Keeps the palette the same in every fragment
+                    optimize=False,
+                )
+                data = file.getvalue()
+                header_end, spans = _gif_frame_spans(data)
+                self.__fragment_blocks[key] = (
+                    data[:header_end],
+                    [data[start:end] for start, end, _ in spans],
+                )
+            blocks_cache[key] = self.__fragment_blocks[key]
+            header, fragment_blocks = blocks_cache[key]
+            blocks.extend(fragment_blocks * fragment.repeat)
+
+        self.__fragment_blocks = blocks_cache
+        return header + b"".join(blocks) + b";"
+
+    def __encode_leds(
+        self, loop: int, workers: int | None = 0, progress: Progress | None = None
+    ) -> bytes | None:
+        """
+        Writes the gif from the LED frames without the generic writer.
+        The timeline is split into segments, one for each process,
+        and the encoded frames of the segments are joined in order.
+
+        :param loop: Looping gif. 0 for infinite loop.
+        :param workers: Number of processes. None for the number of CPUs, 0 - in this process.
+        :param progress: Progress of encoding, the parts done by the processes are added as they finish.
+        :return: Gif file or None if some fragment has frames that are images.
+        """
+        timeline = self.led_timeline()
+        if not timeline:
+            return None
+
+        if progress is not None:
+            progress.update(0)
+        if workers == 0:
+            encoded = self.encode_led_frames(timeline, progress=progress)
+        else:
+            from concurrent.futures import ProcessPoolExecutor, as_completed
+
+            segments = min(workers or os.cpu_count() or 1, len(timeline))
+            bounds = [len(timeline) * n // segments for n in range(segments + 1)]
+            with ProcessPoolExecutor(max_workers=segments) as executor:
+                futures = [
+                    executor.submit(
+                        _encode_segment,
+                        self.columns,
+                        self.rows,
+                        self.scale,
+                        self.color_config,
+                        timeline[start:stop],
+                        timeline[start - 1][0] if start else None,
+                    )
+                    for start, stop in zip(bounds, bounds[1:])
+                ]
+                if progress is not None:
+                    for future in as_completed(futures):
+                        progress.update(len(future.result()))
+                encoded = [frame for future in futures for frame in future.result()]
+
+        return _led_gif(
+            (self.columns_pixels, self.rows_pixels),
+            self.led_palette(),
+            loop,
+            encoded,
+        )
+
+    def led_timeline(self) -> list[tuple[bytes, int, tuple[int, int] | None]] | None:
+        """
+        Every frame of the gif for `encode_led_frames`.
+
+        :return: (leds, duration, key) of each frame or None if some fragment has frames that are images.
+            The repetitions of a fragment have the same keys as the first one,
+            the first frame of a repetition has no key, because it follows another frame.
+        """
+        timeline: list[tuple[bytes, int, tuple[int, int] | None]] = []
+        for position, fragment in enumerate(self._fragments):
+            count = len(fragment) // fragment.repeat
+            if not count:
+                continue
+            frames = list(itertools.islice(fragment.frames(), count))
+            if any(isinstance(leds, Image.Image) for leds in frames):
+                return None
+            leds_frames = [bytes(leds) for leds in frames]  # type: ignore[arg-type]
+            durations = list(itertools.islice(fragment.durations(), count))
+            for _ in range(fragment.repeat):
+                for number, (leds, duration) in enumerate(zip(leds_frames, durations)):
+                    timeline.append(
+                        (leds, duration, (position, number) if number else None)
+                    )
+        return timeline
+
+    def encode_led_frames(
+        self,
+        timeline: list[tuple[bytes, int, tuple[int, int] | None]],
+        previous: bytes | None = None,
+        *,
+        progress: Progress | None = None,
+    ) -> list[tuple[int, bytes | None]]:
+        """
+        Encodes the frames of `led_timeline` or of its part.
+        The frames are drawn with the palette of `generate_led_palette_frame`,
+        which is the global palette of the gif. Each frame after the first one
+        is cut to the box of the LEDs that changed, found by comparing the LED states.
+        The frames with the same key are encoded once.
+
+        :param timeline: (leds, duration, key) of each frame.
+        :param previous: The LEDs of the frame before the first one. None if it is the first frame of the gif.
+        :param progress: Progress of encoding, updated for each frame.
+        :return: (duration, image block) of each frame.
+            The block is None if the frame is the same as the previous one.
+        """
+        from PIL import GifImagePlugin
+
+        size = (self.columns, self.rows)
+        blocks: dict[tuple[int, int], bytes | None] = {}
+        encoded: list[tuple[int, bytes | None]] = []
+        for leds, duration, key in timeline:
+            block: bytes | None
+            if key is not None and key in blocks:
+                block = blocks[key]
+            else:
+                box: tuple[int, int, int, int] | None
+                if previous is None:
+                    box = (0, 0, self.columns_pixels, self.rows_pixels)
+                else:
+                    changed = ImageChops.difference(
+                        Image.frombytes("L", size, previous),
+                        Image.frombytes("L", size, leds),
+                    ).getbbox()
+                    if changed is None:
+                        box = None
+                    else:
+                        left, top, right, bottom = changed
+                        # Each LED is 2x2 pixels with the pitch of 3 pixels from (7, 7)
+                        box = (
+                            (7 + left * 3) * self.scale,
+                            (7 + top * 3) * self.scale,
+                            (6 + right * 3) * self.scale,
+                            (6 + bottom * 3) * self.scale,
+                        )
+                if box is None:
+                    block = None
+                else:
+                    image = self.generate_led_palette_frame(leds)
+                    if box[2:] != image.size:
+                        image = image.crop(box)
+                    block = b"".join(GifImagePlugin.getdata(image, box[:2]))
+                if key is not None:
+                    blocks[key] = block
+            encoded.append((duration, block))
+            previous = leds
+            if progress is not None:
+                progress.update()
+        return encoded
 
-        name: str = (
-            save_path
-            if isinstance(save_path, str)
-            else getattr(save_path, "name", str(save_path))
+    def led_palette(self) -> bytes:
+        """
+        :return: The palette of `generate_led_palette_frame` for the current size and `color_config`.
+        """
+        key = (self.columns, self.rows, self.scale, tuple(self.color_config.items()))
+        if key not in _led_palette_layers:
+            self.generate_led_palette_frame(bytes(self.columns * self.rows))
+        return bytes(_led_palette_layers[key][5])
+
+    def save_segment(
+        self, path: str | Path, index: int, count: int, loop: int | None = None
+    ) -> None:
+        """
+        Encodes one of `count` equal parts of the frames into a segment file,
+        so a long gif can be encoded on several machines. `join_segments` makes the gif of them.
+        Every machine needs the same fragments.
+
+        :param path: Path of the segment file.
+        :param index: Number of the segment from 0.
+        :param count: Number of segments.
+        :param loop: Looping gif. 0 for infinite loop.
+        """
+        if not 0 <= index < count:
+            raise ValueError(f"Segment index out of range: {index}")
+        loop = (self.loop if loop is None else loop) or 0
+        if loop < 0:
+            raise ValueError("loop must be greater than or equal to 0")
+
+        timeline = self.led_timeline()
+        if timeline is None:
+            raise ValueError("Only LED frames can be encoded in segments")
+        if not timeline:
+            raise ValueError("You have not added any fragments")
+        start = len(timeline) * index // count
+        stop = len(timeline) * (index + 1) // count
+        encoded = self.encode_led_frames(
+            timeline[start:stop], timeline[start - 1][0] if start else None
         )
-        start = time.perf_counter()
-        if self.progress_bar:
-            frames = (
-                print_progress_bar(n, count, name, start) or frame
-                for n, frame in enumerate(frames, start=0)
+
+        palette = self.led_palette()
+        with open(path, "wb") as file:
+            file.write(
+                _segment_header.pack(
+                    b"RTGS",
+                    1,
+                    self.columns_pixels,
+                    self.rows_pixels,
+                    loop,
+                    index,
+                    count,
+                    len(palette),
+                    len(encoded),
+                )
             )
+            file.write(palette)
+            for duration, block in encoded:
+                file.write(_segment_frame.pack(duration, len(block or b"")))
+                file.write(block or b"")
 
-        next(frames).save(
-            fp=save_path,
-            format="gif",
-            save_all=True,
-            append_images=frames,
-            duration=durations,
-            loop=loop,
+    def __draw_leds(self, leds: bytes | memoryview, image_format: str) -> Image.Image:
+        """
+        Draws the LEDs of a frame for `image_format`.
+        The gif writer quantizes each frame separately, so the frames with dimmed LEDs
+        are drawn with the palette of `generate_led_palette_frame`, that has every level.
+        """
+        if image_format == "GIF" and bytes(leds).translate(None, b"\x00\xff"):
+            return self.generate_led_palette_frame(leds)
+        return self.generate_led_frame(leds)
+
+    @staticmethod
+    def __counted(
+        frames: Iterable[Frame], progress: Progress
+    ) -> Generator[Frame, Any, None]:
+        """
+        Adds each frame to `progress` when the writer takes the next one.
+        """
+        for frame in frames:
+            yield frame
+            progress.update()
+
+    @staticmethod
+    def __sink_format(sink: SavePath) -> str:
+        if isinstance(sink, BytesIO):
+            return "GIF"
+        return {".png": "PNG", ".apng": "PNG", ".webp": "WEBP"}.get(
+            os.path.splitext(os.fsdecode(sink))[1].lower(), "GIF"
         )
-        if self.progress_bar:
-            print_progress_bar(count, count, name, start)
-        self.clear_fragments()
 
     @staticmethod
     def open(
@@ -658,8 +3129,13 @@ class GIF:
         debug: bool = False,
         debug_path: str | Path | None = None,
         progress_bar: bool = True,
+        color_config: dict[str, str] | None = None,
     ) -> "GIF":
         """
+        If the gif was made by this generator, the size and the scale of the screen are taken
+        from its size and the frames are read back as LED states,
+        so the gif can be saved again with another `color_config`.
+        Otherwise, the frames are kept as images.
 
         :param path: Gif file or path to it. `Image.open(path)`
         :param duration: The speed of each frame within this fragment in milliseconds.
@@ -670,8 +3146,40 @@ class GIF:
         :param debug: Should debug images be printed?
         :param debug_path: Path to save debug images.
         :param progress_bar: Do I need to print the progress bar?
+        :param color_config: Colors the gif was drawn with, if they are not `global_color_config`.
         :return: Open GIF.
         """
+        if isinstance(path, Image.Image):
+            screen = GIF.__screen_size(path)
+        elif isinstance(path, str):
+            with Image.open(path) as image:
+                screen = GIF.__screen_size(image)
+        elif isinstance(path, BytesIO):
+            position = path.tell()
+            with Image.open(path) as image:
+                screen = GIF.__screen_size(image)
+            path.seek(position)
+        else:
+            raise ValueError("Wrong type")
+
+        options: dict[str, Any] = dict(
+            default_font_path=default_font_path,
+            save_path=save_path,
+            loop=loop,
+            debug=debug,
+            debug_path=debug_path,
+            progress_bar=progress_bar,
+        )
+        if screen is not None:
+            columns, rows, scale = screen
+            gif = GIF(columns, rows, scale=scale, **options)
+            if color_config:
+                gif.color_config.update(color_config)
+            gif.add_gif_fragment(path, duration=duration, speed=speed)
+            # Opening reads the file at once, like before fragments became lazy.
+            gif._fragments[-1].realize()
+            return gif
+
         generator = GIF.extract_gif_frames(path, duration=duration, speed=speed)
         frames = []
         durations = []
@@ -679,14 +3187,1062 @@ class GIF:
             frames.append(frame)
             durations.append(duration)
 
+        gif = GIF(*frames[0].size, **options)
+        gif._fragments.append(
+            Fragment(lambda: (frames, durations), type="gif", gif_path=path)
+        )
+        return gif
+
+    @staticmethod
+    def __screen_size(image: Image.Image) -> tuple[int, int, int] | None:
+        """
+        The screen of a gif made by this generator, taken from the size of its frames.
+        The size of a screen at `scale` 4 is also the size of some screen at `scale` 1 and so on,
+        then the scale whose rounded corners are transparent in the frame is taken.
+
+        :param image: Frame of the gif.
+        :return: (columns, rows, scale) or None if no screen has this size.
+        """
+        width, height = image.size
+        screens = []
+        for scale in range(1, min(width, height) // 16 + 1):
+            columns, columns_rest = divmod(width - 13 * scale, 3 * scale)
+            rows, rows_rest = divmod(height - 13 * scale, 3 * scale)
+            if not columns_rest and not rows_rest:
+                screens.append((columns, rows, scale))
+        if len(screens) > 1:
+            alpha = image.convert("RGBA").getchannel("A").tobytes()
+            for columns, rows, scale in screens:
+                frame = GIF(columns, rows, scale=scale).generate_frame()
+                if frame.getchannel("A").tobytes() == alpha:
+                    return columns, rows, scale
+        return screens[0] if screens else None
+
+    @staticmethod
+    def from_spec(
+        spec: dict[str, Any],
+        *,
+        cache: RenderCache | None = None,
+        progress_bar: bool = False,
+    ) -> "GIF":
+        """
+        Creates a gif from a plain description, for example loaded from JSON.
+
+        {
+            "columns": 79,
+            "rows": 9,
+            "scale": 1,
+            "loop": 0,
+            "default_font_path": "./fonts/Monocraft.otf",
+            "color_config": {"color_pixel_on_dark": "#00FF00"},
+            "path": "text.gif",
+            "fragments": [
+                {"type": "text", "text": "text", "intro": true},
+                {"type": "image", "image_path": "dino.png", "speed": 24},
+                {"type": "gif", "gif_path": "text.gif"}
+            ]
+        }
+
+        Everything except "fragments" is optional.
+        The other keys of a fragment are the arguments of
+        `add_text_fragment`, `add_image_fragment` or `add_gif_fragment`.
+
+        :param spec: Description of the gif.
+        :param cache: Cache of LED frames for text fragments.
+        :param progress_bar: Do I need to print the progress bar?
+        :return: GIF with the fragments added.
+        """
+        unknown = set(spec) - set(_spec_keys)
+        if unknown:
+            raise ValueError(f"Unknown keys in the gif spec: {sorted(unknown)}")
+        if not spec.get("fragments"):
+            raise ValueError("You have not added any fragments")
+
         gif = GIF(
-            *frames[0].size,
-            default_font_path=default_font_path,
-            save_path=save_path,
-            loop=loop,
-            debug=debug,
-            debug_path=debug_path,
+            spec.get("columns", 79),
+            spec.get("rows", 9),
+            default_font_path=spec.get("default_font_path"),
+            save_path=spec.get("path"),
+            loop=spec.get("loop", 0),
             progress_bar=progress_bar,
+            cache=cache,
+            scale=spec.get("scale", 1),
         )
-        gif._fragments.append((frames, durations, len(frames)))
+        gif.color_config.update(spec.get("color_config", {}))
+        methods: dict[str, Callable[..., int]] = {
+            "text": gif.add_text_fragment,
+            "image": gif.add_image_fragment,
+            "gif": gif.add_gif_fragment,
+        }
+        for fragment in spec["fragments"]:
+            arguments = dict(fragment)
+            fragment_type = arguments.pop("type", None)
+            if fragment_type not in methods:
+                raise ValueError(
+                    f'Fragment type can only be one of "text", "image" or "gif". '
+                    f'Not "{fragment_type}".'
+                )
+            methods[fragment_type](**arguments)
         return gif
+
+
+# magic, version, width, height, loop, index, count, palette size, number of frames
+_segment_header = struct.Struct("<4sBHHHHHHI")
+# duration, size of the image block. 0 - the same frame as the previous one
+_segment_frame = struct.Struct("<II")
+
+
+def _encode_segment(
+    columns: int,
+    rows: int,
+    scale: int,
+    color_config: dict[str, str],
+    timeline: list[tuple[bytes, int, tuple[int, int] | None]],
+    previous: bytes | None,
+) -> list[tuple[int, bytes | None]]:
+    """
+    `GIF.encode_led_frames` in a worker process of `GIF.save(..., workers=...)`.
+    """
+    gif = GIF(columns, rows, progress_bar=False, scale=scale)
+    gif.color_config = color_config
+    return gif.encode_led_frames(timeline, previous)
+
+
+def join_segments(paths: Iterable[str | Path], path: SavePath) -> None:
+    """
+    Joins the segment files of `GIF.save_segment` into a gif.
+
+    :param paths: All segment files of the gif.
+    :param path: Path or file for GIF.
+    """
+    segments: dict[int, list[tuple[int, bytes | None]]] = {}
+    header: tuple | None = None
+    for segment_path in paths:
+        with open(segment_path, "rb") as file:
+            data = file.read()
+        if len(data) < _segment_header.size:
+            raise ValueError(f"Not a segment file: {segment_path}")
+        magic, version, *fields, palette_size, frames_count = (
+            _segment_header.unpack_from(data)
+        )
+        if magic != b"RTGS" or version != 1:
+            raise ValueError(f"Not a segment file: {segment_path}")
+        position = _segment_header.size + palette_size
+        header_size = _segment_header.size
+        palette = data[header_size:position]
+        width, height, loop, index, count = fields
+        if header is None:
+            header = (width, height, loop, count, palette)
+        elif header != (width, height, loop, count, palette):
+            raise ValueError(f"The segment is from another gif: {segment_path}")
+
+        frames: list[tuple[int, bytes | None]] = []
+        for _ in range(frames_count):
+            duration, block_size = _segment_frame.unpack_from(data, position)
+            position += _segment_frame.size
+            end = position + block_size
+            frames.append((duration, data[position:end] or None))
+            position = end
+        segments[index] = frames
+
+    if header is None:
+        raise ValueError("You have not added any segments")
+    width, height, loop, count, palette = header
+    missing = sorted(set(range(count)) - set(segments))
+    if missing:
+        raise ValueError(f"Segments are missing: {missing}")
+
+    gif = _led_gif(
+        (width, height),
+        palette,
+        loop,
+        (frame for index in range(count) for frame in segments[index]),
+    )
+    if isinstance(path, BytesIO):
+        path.write(gif)
+    else:
+        with open(path, "wb") as file:
+            file.write(gif)
+
+
+class Player:
+    """
+    Shows the frames of a gif at their durations, for live displays.
+
+    for frame in Player(gif):
+        display.show(frame)
+
+    The frames are taken from the fragments while playing, each fragment is built when it is reached,
+    and at most `lookahead` frames are drawn in advance by a background thread,
+    so memory does not grow with the length of the animation.
+    The time goes by a monotonic clock. If the consumer falls behind,
+    the frames whose time has already passed are dropped, so the animation keeps its pace.
+    """
+
+    def __init__(
+        self,
+        gif: GIF,
+        *,
+        images: bool = True,
+        loop: int | None = None,
+        lookahead: int = 2,
+        late_tolerance: float = 0.002,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], Any] = time.sleep,
+    ):
+        """
+
+        :param gif: GIF with fragments. They are not cleared.
+        :param images: Draw the frames. Otherwise, LED bytes are returned,
+            except for the frames of gif fragments that were kept as images.
+        :param loop: Number of times the animation is played. 0 for infinite loop. `gif.loop` by default.
+        :param lookahead: Number of frames drawn in advance. 0 draws each frame when it is due.
+        :param late_tolerance: A frame returned later than this many seconds is counted as late.
+        :param clock: Seconds, monotonic.
+        :param sleep: Waits the given number of seconds.
+        """
+        loop = gif.loop if loop is None else loop
+        if loop < 0:
+            raise ValueError("loop must be greater than or equal to 0")
+        if lookahead < 0:
+            raise ValueError("lookahead must be greater than or equal to 0")
+
+        self.gif = gif
+        self.images = images
+        self.loop = loop
+        self.lookahead = lookahead
+        self.late_tolerance = late_tolerance
+        self.clock = clock
+        self.sleep = sleep
+        self.shown = 0
+        self.dropped = 0
+        self.late = 0
+        self.max_jitter = 0.0
+        self.__total_jitter = 0.0
+        # The frames are dropped by both threads
+        self.__lock = threading.Lock()
+
+    def stats(self) -> dict[str, Any]:
+        """
+        jitter is how much later than scheduled the frames were returned, in seconds.
+        """
+        return {
+            "shown": self.shown,
+            "dropped": self.dropped,
+            "late": self.late,
+            "max_jitter": self.max_jitter,
+            "mean_jitter": self.__total_jitter / self.shown if self.shown else 0.0,
+        }
+
+    def __timeline(
+        self, start: float
+    ) -> Generator[tuple[Frame, float, float], Any, None]:
+        """
+        Frames with their start and end times. Dropped frames are not drawn.
+        Each fragment is built when the timeline reaches it.
+        """
+        plays: Iterable[int] = itertools.count() if self.loop == 0 else range(self.loop)
+        end = start
+        for _ in plays:
+            # A pass without frames would be repeated forever
+            played = False
+            for fragment in self.gif._fragments:
+                for frame, duration in zip(fragment.frames(), fragment.durations()):
+                    played = True
+                    frame_start, end = end, end + duration / 1000
+                    if self.clock() >= end:
+                        with self.__lock:
+                            self.dropped += 1
+                        continue
+                    if self.images:
+                        frame = self.gif.frame_image(frame)
+                    yield frame, frame_start, end
+            if not played:
+                return
+
+    def __prefetched(
+        self, start: float
+    ) -> Generator[tuple[Frame, float, float], Any, None]:
+        import queue
+
+        frames: queue.Queue = queue.Queue(maxsize=self.lookahead)
+        stop = threading.Event()
+
+        def put(item: tuple[Frame, float, float] | BaseException | None) -> bool:
+            # The consumer can stop while the queue is full
+            while not stop.is_set():
+                try:
+                    frames.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    pass
+            return False
+
+        def produce() -> None:
+            try:
+                for item in self.__timeline(start):
+                    if not put(item):
+                        return
+                put(None)
+            except BaseException as e:
+                put(e)
+
+        thread = threading.Thread(target=produce, daemon=True)
+        thread.start()
+        try:
+            while (item := frames.get()) is not None:
+                if isinstance(item, BaseException):
+                    raise item
+                yield item
+        finally:
+            stop.set()
+            thread.join()
+
+    def __iter__(self) -> Generator[Frame, Any, None]:
+        # Building the first fragment must not make the first frames late,
+        # the next ones are built by the timeline when it reaches them
+        if self.gif._fragments:
+            self.gif._fragments[0].realize()
+        start = self.clock()
+        timeline = (
+            self.__prefetched(start) if self.lookahead else self.__timeline(start)
+        )
+        for frame, frame_start, end in timeline:
+            now = self.clock()
+            if now >= end:
+                with self.__lock:
+                    self.dropped += 1
+                continue
+            if now < frame_start:
+                self.sleep(frame_start - now)
+                now = self.clock()
+
+            jitter = max(now - frame_start, 0.0)
+            self.shown += 1
+            self.max_jitter = max(self.max_jitter, jitter)
+            self.__total_jitter += jitter
+            if jitter > self.late_tolerance:
+                self.late += 1
+            yield frame
+
+
+_spec_keys = (
+    "columns",
+    "rows",
+    "scale",
+    "loop",
+    "default_font_path",
+    "color_config",
+    "path",
+    "fragments",
+)
+
+
+class BatchResult:
+    """
+    Result of one spec of `render_batch`.
+    """
+
+    def __init__(
+        self,
+        index: int,
+        spec: dict[str, Any],
+        data: bytes | None = None,
+        error: BaseException | None = None,
+        seconds: float = 0.0,
+        skipped: bool = False,
+    ):
+        """
+
+        :param index: Position of the spec in the batch.
+        :param spec: The spec itself.
+        :param data: The encoded gif, if the spec has no "path".
+        :param error: The exception raised while rendering.
+        :param seconds: Rendering time.
+        :param skipped: The output was not rendered because its inputs have not changed.
+        """
+        self.index = index
+        self.spec = spec
+        self.data = data
+        self.error = error
+        self.seconds = seconds
+        self.skipped = skipped
+
+    def __repr__(self) -> str:
+        if self.error:
+            status = f"error={self.error!r}"
+        elif self.skipped:
+            status = "skipped=True"
+        else:
+            status = f"seconds={self.seconds:.3f}"
+        return f"{self.__class__.__name__}(index={self.index}, {status})"
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+def render_spec(
+    spec: dict[str, Any], cache: RenderCache | None = None
+) -> tuple[bytes | None, float]:
+    """
+    Renders one spec of `GIF.from_spec`.
+    Fonts and the frames with all LEDs off and on are shared
+    by all the gifs rendered in a process.
+
+    :param spec: Description of the gif.
+    :param cache: Cache of LED frames for text fragments.
+    :return: The encoded gif, or None if it was saved to the "path" of the spec,
+        and the rendering time.
+    """
+    start = time.perf_counter()
+    return _render_gif(GIF.from_spec(spec, cache=cache), start)
+
+
+def _render_gif(gif: GIF, start: float) -> tuple[bytes | None, float]:
+    """
+    Saves the gif of a spec, see `render_spec`.
+
+    :param gif: Gif of the spec.
+    :param start: `time.perf_counter()` when the rendering started.
+    :return: The encoded gif or None, and the rendering time.
+    """
+    data = None
+    if gif.save_path is None:
+        file = BytesIO()
+        gif.save(file)
+        data = file.getvalue()
+    else:
+        gif.save()
+    return data, time.perf_counter() - start
+
+
+def _render_request(
+    spec: dict[str, Any], cache: RenderCache | None
+) -> tuple[int, bytes, float]:
+    """
+    Renders the spec of a `RenderServer` request.
+    The ValueError and TypeError of `GIF.from_spec` are mistakes in the spec and are returned,
+    the errors of the rendering itself are raised.
+
+    :param spec: Description of the gif.
+    :param cache: Cache of LED frames for text fragments.
+    :return: HTTP status, the gif or the error message, and the rendering time.
+    """
+    start = time.perf_counter()
+    try:
+        gif = GIF.from_spec(spec, cache=cache)
+    except (ValueError, TypeError) as e:
+        return 400, f"{type(e).__name__}: {e}".encode(), 0.0
+    data, seconds = _render_gif(gif, start)
+    return 200, data or b"", seconds
+
+
+def render_batch(
+    specs: Iterable[dict[str, Any]],
+    *,
+    workers: int | None = None,
+    cache: RenderCache | None = None,
+    progress: Callable[[Progress], Any] | None = None,
+) -> Generator[BatchResult, Any, None]:
+    """
+    Renders many gifs, see `GIF.from_spec`.
+    The specs are spread over a pool of processes,
+    and each process keeps its fonts and frames between the gifs.
+    The results are returned in the order they are finished.
+    An error in one spec does not stop the others, it is returned in its result.
+
+    :param specs: Descriptions of the gifs.
+    :param workers: Number of processes. `os.cpu_count()` by default.
+        0 renders everything in the current process.
+    :param cache: Cache of LED frames for text fragments, shared by the processes.
+    :param progress: A function that takes the `Progress` of the batch, counted in gifs.
+        It is called at most `GIF.progress_interval` seconds apart.
+    :return: Generator of results.
+    """
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if workers < 0:
+        raise ValueError("workers must be greater than or equal to 0")
+
+    specs = list(specs)
+    batch_progress = Progress(
+        len(specs),
+        progress or (lambda _: None),
+        name="render_batch",
+        interval=GIF.progress_interval,
+    )
+    if workers == 0:
+        for index, spec in enumerate(specs):
+            try:
+                data, seconds = render_spec(spec, cache)
+            except Exception as e:
+                result = BatchResult(index, spec, error=e)
+            else:
+                result = BatchResult(index, spec, data, seconds=seconds)
+            batch_progress.update()
+            yield result
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            executor.submit(render_spec, spec, cache): (index, spec)
+            for index, spec in enumerate(specs)
+        }
+        try:
+            for future in as_completed(futures):
+                index, spec = futures[future]
+                error = future.exception()
+                if error is not None:
+                    result = BatchResult(index, spec, error=error)
+                else:
+                    data, seconds = future.result()
+                    result = BatchResult(index, spec, data, seconds=seconds)
+                batch_progress.update()
+                yield result
+        finally:
+            # A batch that is not read to the end does not render the specs still waiting
+            executor.shutdown(cancel_futures=True)
+
+
+def _warm_up(font_paths: tuple[str, ...]) -> None:
+    """
+    Loads the fonts in a new worker process before the first request.
+    """
+    for font_path in font_paths:
+        load_font(font_path, 54)
+
+
+def _http_server(
+    address: tuple[str, int] | str, owner: RenderServer
+) -> ThreadingHTTPServer:
+    """
+    Creates the HTTP server of a `RenderServer`.
+
+    :param address: (host, port) or the path of a unix socket.
+    :param owner: The server that renders the requests.
+    :return: Not started server.
+    """
+    import json
+    import socket
+    import socketserver
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class RequestHandler(BaseHTTPRequestHandler):
+        def do_GET(self) -> None:
+            if self.path != "/stats":
+                self.send_error(404)
+                return
+            self.__send(200, "application/json", json.dumps(owner.stats()).encode())
+
+        def do_POST(self) -> None:
+            if self.path != "/render":
+                self.send_error(404)
+                return
+            try:
+                spec = json.loads(
+                    self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                )
+                if not isinstance(spec, dict):
+                    raise ValueError("The spec must be a JSON object")
+                if "path" in spec:
+                    raise ValueError("The server does not save to files")
+            except ValueError as e:
+                self.__send(400, "text/plain", str(e).encode())
+                return
+
+            status, data = owner.render(spec)
+            if status == 200:
+                self.__send(status, "image/gif", data)
+            else:
+                self.__send(status, "text/plain", data)
+
+        def __send(self, status: int, content_type: str, data: bytes) -> None:
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def address_string(self) -> str:
+            # A unix socket has no client address
+            return str(self.client_address[0]) if self.client_address else "unix"
+
+        def log_message(self, format: str, *args: Any) -> None:
+            if owner.log:
+                super().log_message(format, *args)
+
+    if not isinstance(address, str):
+        return ThreadingHTTPServer(address, RequestHandler)
+
+    if not hasattr(socket, "AF_UNIX"):
+        raise ValueError("Unix sockets are not supported on this platform")
+
+    class UnixHTTPServer(ThreadingHTTPServer):
+        address_family = socket.AF_UNIX
+
+        def server_bind(self) -> None:
+            socketserver.TCPServer.server_bind(self)
+            self.server_name, self.server_port = "localhost", 0
+
+    return UnixHTTPServer(address, RequestHandler)  # type: ignore[arg-type]
+
+
+class RenderServer:
+    """
+    HTTP server that renders the specs of `GIF.from_spec`.
+
+    POST /render with a spec as JSON returns the gif,
+    400 if the spec is wrong or 500 if the rendering failed.
+    GET /stats returns the counters of the server as JSON.
+
+    The gifs are rendered by a pool of processes that is started once,
+    so the requests do not pay for starting Python and loading the fonts.
+    At most `max_concurrency` specs are rendered at the same time
+    and at most `max_queue` more wait for their turn,
+    other requests get 503 right away.
+    The server is meant for local use: the specs can read any image, gif or font
+    the server can read, but cannot write files.
+    """
+
+    def __init__(
+        self,
+        address: tuple[str, int] | str = ("127.0.0.1", 8000),
+        *,
+        workers: int | None = None,
+        max_concurrency: int | None = None,
+        max_queue: int = 64,
+        cache: RenderCache | None = None,
+        font_paths: Iterable[str | Path] = (),
+        log: bool = False,
+    ):
+        """
+
+        :param address: (host, port) or the path of a unix socket.
+            Port 0 picks a free port, see `address`.
+        :param workers: Number of processes. `os.cpu_count()` by default.
+            0 renders in the threads of the server.
+        :param max_concurrency: Number of specs rendered at the same time. `workers` by default.
+        :param max_queue: Number of requests that can wait for rendering.
+        :param cache: Cache of LED frames for text fragments.
+        :param font_paths: Fonts to load before the first request. `GIF.default_font_path` is always loaded.
+        :param log: Print a line for every request.
+        """
+        if workers is None:
+            workers = os.cpu_count() or 1
+        if workers < 0:
+            raise ValueError("workers must be greater than or equal to 0")
+        if max_concurrency is None:
+            max_concurrency = max(workers, 1)
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be greater than or equal to 1")
+        if max_queue < 0:
+            raise ValueError("max_queue must be greater than or equal to 0")
+
+        self.cache = cache
+        self.log = log
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.__slots = threading.BoundedSemaphore(max_concurrency)
+        self.__lock = threading.Lock()
+        self.__counters = {
+            "requests": 0,
+            "rendered": 0,
+            "errors": 0,
+            "rejected": 0,
+            "queued": 0,
+            "rendering": 0,
+        }
+        self.__render_seconds = 0.0
+        self.__started = time.time()
+
+        preloaded_fonts = tuple(
+            dict.fromkeys(
+                str(font_path)
+                for font_path in (GIF.default_font_path, *font_paths)
+                if os.path.exists(font_path)
+            )
+        )
+        from concurrent.futures import ProcessPoolExecutor
+
+        self.__executor: ProcessPoolExecutor | None = None
+        if workers:
+            self.__executor = ProcessPoolExecutor(
+                max_workers=workers,
+                initializer=_warm_up,
+                initargs=(preloaded_fonts,),
+            )
+            # the pool starts its processes with the first jobs, not the first requests
+            for future in [self.__executor.submit(os.getpid) for _ in range(workers)]:
+                future.result()
+        else:
+            _warm_up(preloaded_fonts)
+        self.workers = workers
+
+        self.__server = _http_server(address, self)
+        self.__thread: threading.Thread | None = None
+
+    def __enter__(self) -> "RenderServer":
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    @property
+    def address(self) -> tuple[str, int] | str:
+        return self.__server.server_address  # type: ignore[return-value]
+
+    def render(self, spec: dict[str, Any]) -> tuple[int, bytes]:
+        """
+        Renders a spec, waiting for a free slot.
+
+        :param spec: Description of the gif.
+        :return: HTTP status and the gif or the error message.
+        """
+        with self.__lock:
+            self.__counters["requests"] += 1
+            waiting = self.__counters["queued"] + self.__counters["rendering"]
+            if waiting >= self.max_queue + self.max_concurrency:
+                self.__counters["rejected"] += 1
+                return 503, b"The queue is full"
+            self.__counters["queued"] += 1
+
+        with self.__slots:
+            with self.__lock:
+                self.__counters["queued"] -= 1
+                self.__counters["rendering"] += 1
+            try:
+                if self.__executor is None:
+                    status, data, seconds = _render_request(spec, self.cache)
+                else:
+                    status, data, seconds = self.__executor.submit(
+                        _render_request, spec, self.cache
+                    ).result()
+            except Exception as e:
+                # The spec was valid, the server or its workers failed
+                status, data, seconds = 500, f"{type(e).__name__}: {e}".encode(), 0.0
+            finally:
+                with self.__lock:
+                    self.__counters["rendering"] -= 1
+
+        with self.__lock:
+            if status == 200:
+                self.__counters["rendered"] += 1
+                self.__render_seconds += seconds
+            else:
+                self.__counters["errors"] += 1
+        return status, data
+
+    def stats(self) -> dict[str, Any]:
+        with self.__lock:
+            return {
+                **self.__counters,
+                "render_seconds": self.__render_seconds,
+                "uptime": time.time() - self.__started,
+                "workers": self.workers,
+                "max_concurrency": self.max_concurrency,
+                "max_queue": self.max_queue,
+            }
+
+    def serve_forever(self) -> None:
+        self.__server.serve_forever()
+
+    def start(self) -> None:
+        """
+        Serves in a background thread.
+        """
+        if self.__thread is None:
+            self.__thread = threading.Thread(target=self.serve_forever, daemon=True)
+            self.__thread.start()
+
+    def close(self) -> None:
+        if self.__thread is not None:
+            self.__server.shutdown()
+            self.__thread.join()
+            self.__thread = None
+        self.__server.server_close()
+        if isinstance(self.address, str) and os.path.exists(self.address):
+            os.remove(self.address)
+        if self.__executor is not None:
+            self.__executor.shutdown()
+
+
+# Arguments of the fragments and the spec that are files
+_spec_file_keys = ("path", "default_font_path")
+_fragment_file_keys = ("image_path", "gif_path", "font_path")
+
+
+def load_manifest(manifest_path: str | Path) -> list[dict[str, Any]]:
+    """
+    Reads the specs of the outputs from a JSON or TOML manifest.
+
+    {
+        "defaults": {"columns": 30, "color_config": {"color_pixel_on_dark": "#00FF00"}},
+        "outputs": [
+            {"path": "one.gif", "fragments": [{"type": "text", "text": "one"}]},
+            {"path": "two.gif", "fragments": [{"type": "text", "text": "two"}]}
+        ]
+    }
+
+    Each output is a spec of `GIF.from_spec` and must have a "path".
+    "defaults" are added to every output that does not set them.
+    Relative paths are relative to the manifest.
+
+    :param manifest_path: Path to a ".json" or ".toml" file.
+    :return: Specs.
+    """
+    import json
+    from pathlib import Path
+
+    manifest_path = Path(manifest_path)
+    if manifest_path.suffix.lower() == ".toml":
+        try:
+            import tomllib
+        except ImportError:  # Python 3.10
+            raise ValueError("TOML manifests need Python 3.11 or newer") from None
+
+        with open(manifest_path, "rb") as toml_file:
+            manifest = tomllib.load(toml_file)
+    else:
+        with open(manifest_path, encoding="utf-8") as file:
+            manifest = json.load(file)
+
+    if not isinstance(manifest, dict) or not isinstance(manifest.get("outputs"), list):
+        raise ValueError("The manifest must have a list of outputs")
+
+    base = manifest_path.parent
+
+    def resolve(value: Any) -> Any:
+        return str(base / value) if isinstance(value, str) else value
+
+    specs = []
+    for output in manifest["outputs"]:
+        spec = {**manifest.get("defaults", {}), **output}
+        if not spec.get("path"):
+            raise ValueError("Every output of the manifest must have a path")
+        for key in _spec_file_keys:
+            if key in spec:
+                spec[key] = (
+                    [resolve(value) for value in spec[key]]
+                    if isinstance(spec[key], list)
+                    else resolve(spec[key])
+                )
+        spec["fragments"] = [
+            {
+                key: (
+                    (
+                        [resolve(path) for path in value]
+                        if isinstance(value, list)
+                        else resolve(value)
+                    )
+                    if key in _fragment_file_keys
+                    else value
+                )
+                for key, value in fragment.items()
+            }
+            for fragment in spec.get("fragments", [])
+        ]
+        specs.append(spec)
+    return specs
+
+
+def spec_fingerprint(
+    spec: dict[str, Any], file_digests: dict[str, list] | None = None
+) -> str:
+    """
+    Hash of a spec and the content of the files it reads.
+    It does not change while neither the spec nor the files do.
+
+    :param spec: Description of the gif.
+    :param file_digests: path -> [mtime_ns, size, digest].
+        The digest of a file is read from here while its mtime and size are the same,
+        new digests are added.
+    :return: Hex digest.
+    """
+    import json
+    import hashlib
+
+    if file_digests is None:
+        file_digests = {}
+
+    inputs = [spec.get("default_font_path") or GIF.default_font_path]
+    for fragment in spec.get("fragments", []):
+        for key in _fragment_file_keys:
+            value = fragment.get(key)
+            # A chain of fonts is a list of paths
+            inputs.extend(
+                path
+                for path in (value if isinstance(value, list) else [value])
+                if isinstance(path, str)
+            )
+
+    digests = []
+    for input_path in inputs:
+        input_path = os.path.abspath(input_path)
+        try:
+            stat = os.stat(input_path)
+        except OSError:
+            digests.append((input_path, None))
+            continue
+        known = file_digests.get(input_path)
+        if known is None or known[:2] != [stat.st_mtime_ns, stat.st_size]:
+            with open(input_path, "rb") as file:
+                digest = hashlib.sha256(file.read()).hexdigest()
+            known = file_digests[input_path] = [stat.st_mtime_ns, stat.st_size, digest]
+        digests.append((input_path, known[2]))
+
+    return hashlib.sha256(
+        json.dumps([spec, digests], sort_keys=True, default=str).encode()
+    ).hexdigest()
+
+
+def render_manifest(
+    manifest_path: str | Path,
+    *,
+    workers: int | None = 0,
+    force: bool = False,
+    state_path: str | Path | None = None,
+    cache: RenderCache | None = None,
+) -> Generator[BatchResult, Any, None]:
+    """
+    Renders every output of a manifest, see `load_manifest`.
+    The fingerprints of the rendered outputs are kept in a state file,
+    and the outputs whose spec and files have not changed since then are skipped.
+
+    :param manifest_path: Path to a ".json" or ".toml" file.
+    :param workers: Number of processes, see `render_batch`.
+    :param force: Render every output.
+    :param state_path: The state file. The manifest path with ".state" added by default.
+    :param cache: Cache of LED frames for text fragments.
+    :return: Generator of results.
+    """
+    import json
+    from pathlib import Path
+
+    specs = load_manifest(manifest_path)
+    state_path = Path(f"{manifest_path}.state" if state_path is None else state_path)
+    state: dict[str, Any] = {"outputs": {}, "files": {}}
+    if state_path.exists():
+        with open(state_path, encoding="utf-8") as file:
+            state = json.load(file)
+
+    fingerprints = [spec_fingerprint(spec, state["files"]) for spec in specs]
+    pending = []
+    for index, (spec, fingerprint) in enumerate(zip(specs, fingerprints)):
+        outputs = spec["path"] if isinstance(spec["path"], list) else [spec["path"]]
+        if (
+            not force
+            and all(os.path.exists(output) for output in outputs)
+            and state["outputs"].get(json.dumps(spec["path"])) == fingerprint
+        ):
+            yield BatchResult(index, spec, skipped=True)
+        else:
+            for output in outputs:
+                Path(output).parent.mkdir(parents=True, exist_ok=True)
+            pending.append(index)
+
+    try:
+        for result in render_batch(
+            (specs[index] for index in pending), workers=workers, cache=cache
+        ):
+            result.index = pending[result.index]
+            if result.ok:
+                state["outputs"][json.dumps(result.spec["path"])] = fingerprints[
+                    result.index
+                ]
+            yield result
+    finally:
+        temp_path = state_path.with_name(f"{state_path.name}.{os.getpid()}.tmp")
+        with open(temp_path, "w", encoding="utf-8") as file:
+            json.dump(state, file)
+        os.replace(temp_path, state_path)
+
+
+def main(argv: list[str] | None = None) -> int:
+    """
+    python -m gif render manifest.json
+    python -m gif serve --port 8000
+    """
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        prog="python -m gif", description="GIF generator with a running text line"
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    render = commands.add_parser("render", help="render the outputs of a manifest")
+    render.add_argument("manifest", help="JSON or TOML manifest")
+    render.add_argument(
+        "-j", "--workers", type=int, default=0, help="number of processes"
+    )
+    render.add_argument(
+        "-f", "--force", action="store_true", help="render unchanged outputs too"
+    )
+    render.add_argument("--state", help="state file, MANIFEST.state by default")
+    render.add_argument("--cache", help="directory of the render cache")
+
+    serve = commands.add_parser("serve", help="start a render server")
+    serve.add_argument("--host", default="127.0.0.1")
+    serve.add_argument("--port", type=int, default=8000)
+    serve.add_argument("--unix", help="path of a unix socket instead of a port")
+    serve.add_argument("-j", "--workers", type=int, help="number of processes")
+    serve.add_argument("--max-concurrency", type=int)
+    serve.add_argument("--max-queue", type=int, default=64)
+    serve.add_argument("--cache", help="directory of the render cache")
+
+    arguments = parser.parse_args(argv)
+    cache = RenderCache(arguments.cache) if arguments.cache else None
+
+    if arguments.command == "serve":
+        server = RenderServer(
+            arguments.unix or (arguments.host, arguments.port),
+            workers=arguments.workers,
+            max_concurrency=arguments.max_concurrency,
+            max_queue=arguments.max_queue,
+            cache=cache,
+            log=True,
+        )
+        print(f"Serving on {server.address}", flush=True)
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.close()
+        return 0
+
+    start = time.perf_counter()
+    counts = {"rendered": 0, "skipped": 0, "failed": 0}
+    for result in render_manifest(
+        arguments.manifest,
+        workers=arguments.workers,
+        force=arguments.force,
+        state_path=arguments.state,
+        cache=cache,
+    ):
+        if result.skipped:
+            status = "skipped"
+            print(f"skipped  {result.spec['path']}")
+        elif result.ok:
+            status = "rendered"
+            print(f"{result.seconds:>7.3f}s {result.spec['path']}")
+        else:
+            status = "failed"
+            print(
+                f"failed   {result.spec['path']}: "
+                f"{type(result.error).__name__}: {result.error}",
+                file=sys.stderr,
+            )
+        counts[status] += 1
+    print(
+        ", ".join(f"{count} {status}" for status, count in counts.items())
+        + f" in {time.perf_counter() - start:.2f}s"
+    )
+    return 1 if counts["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
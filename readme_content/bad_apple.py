@@ -8,13 +8,15 @@ import zipfile
 
 from PIL import Image
 
-from gif import GIF
+from gif import GIF, FrameStore
 
 
 c = 1.3333333333333333
 x = 90
 y = math.ceil(x / c)
-gif = GIF(columns=x, rows=y)
+# LED frames are kept in a memory-mapped file instead of memory
+frame_store = FrameStore(x, y)
+gif = GIF(columns=x, rows=y, frame_store=frame_store)
 gif.color_config["color_pixel_off_light"] = "#EFEFEF"
 gif.color_config["color_pixel_off_dark"] = "#BFBFBF"
 gif.color_config["color_pixel_on_light"] = "#2F2F2F"
@@ -32,3 +34,4 @@ with zipfile.ZipFile("frames.zip", "r") as zip_ref:
             )
 
 gif.save(path="bad_apple.gif")
+frame_store.close()
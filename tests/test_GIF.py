@@ -1,10 +1,14 @@
+import gc
+import warnings
 from io import BytesIO
+from pathlib import Path
 
 # noinspection PyPackageRequirements
 import pytest
+from PIL import Image, ImageFont
 
-from gif import GIF
-from tests.utils import compare_gif
+from gif import GIF, gif_durations, font_runs
+from tests.utils import compare_gif, leds_frames
 
 
 # noinspection PyPep8Naming
@@ -88,3 +92,252 @@ def test_open():
         progress_bar=False,
     )
     assert compare_gif(gif, "tests/result_images/test_GIF/1/test_GIF_1.gif")
+
+
+def test_gif_durations():
+    path = "tests/result_images/test_GIF/1/test_GIF_1.gif"
+    durations = gif_durations(path)
+    assert len(durations) == 645
+    assert durations == [duration for _, duration in GIF.extract_gif_frames(path)]
+    with open(path, "rb") as file:
+        assert gif_durations(BytesIO(file.read())) == durations
+    assert gif_durations(Image.open(path)) == durations
+
+
+def test_extract_gif_leds():
+    gif = GIF(progress_bar=False)
+    gif.add_text_fragment("leds", duration=30)
+    gif.add_text_fragment("up", direction="up", duration=50)
+    leds_frames = [
+        bytes(leds) for fragment in gif._fragments for leds in fragment.frames()
+    ]
+    file = BytesIO()
+    gif.save(file, clear=False)
+
+    # The gif writer merges identical frames
+    expected = [
+        leds
+        for n, leds in enumerate(leds_frames)
+        if n == 0 or leds != leds_frames[n - 1]
+    ]
+    result = list(gif.extract_gif_leds(file))
+    assert [leds for leds, _ in result] == expected
+    assert [duration for _, duration in result] == gif_durations(file)
+    assert (
+        len(list(gif.extract_gif_leds(file, speed=2, duration=10)))
+        == (len(expected) + 1) // 2
+    )
+
+
+def test_open_leds():
+    colors = {
+        "color_pixel_off_light": "#438600",
+        "color_pixel_off_dark": "#346800",
+        "color_pixel_on_light": "#B9FF73",
+        "color_pixel_on_dark": "#6AD500",
+    }
+    gif = GIF(columns=20, rows=5, progress_bar=False)
+    gif.color_config.update(colors)
+    gif.add_text_fragment("open", duration=30)
+    file = BytesIO()
+    gif.save(file)
+
+    # Without the colors the frames can only be kept as images
+    file.seek(0)
+    opened = GIF.open(file, progress_bar=False)
+    assert (opened.columns, opened.rows) == (20, 5)
+    assert all(
+        isinstance(frame, Image.Image) for frame in opened._fragments[0].frames()
+    )
+
+    file.seek(0)
+    opened = GIF.open(file, progress_bar=False, color_config=colors)
+    assert (opened.columns, opened.rows) == (20, 5)
+    assert all(isinstance(frame, bytes) for frame in opened._fragments[0].frames())
+    assert list(opened._fragments[0].durations()) == gif_durations(file)
+    resaved = BytesIO()
+    opened.save(resaved, clear=False)
+    assert resaved.getvalue() == file.getvalue()
+
+    # Re-theming
+    opened.color_config = GIF.global_color_config.copy()
+    themed = GIF(columns=20, rows=5, progress_bar=False)
+    themed.add_text_fragment("open", duration=30)
+    default, resaved = BytesIO(), BytesIO()
+    themed.save(default)
+    opened.save(resaved)
+    assert resaved.getvalue() == default.getvalue()
+
+    with pytest.raises(ValueError):
+        next(GIF(columns=20, rows=5).extract_gif_leds(file, strict=True))
+
+    # The scale is taken from the size too, 20x5 LEDs at scale 4 are as large as 93x33 at scale 1
+    for scale in (2, 4):
+        gif = GIF(columns=20, rows=5, progress_bar=False, scale=scale)
+        gif.add_text_fragment("open", duration=30)
+        file = BytesIO()
+        gif.save(file, clear=False)
+        file.seek(0)
+        opened = GIF.open(file, progress_bar=False)
+        assert (opened.columns, opened.rows, opened.scale) == (20, 5, scale)
+        assert leds_frames(opened._fragments[0]) == leds_frames(gif._fragments[0])
+
+
+def test_open_closes_files(tmp_path: Path):
+    path = str(tmp_path / "open.gif")
+    gif = GIF(columns=20, rows=5, progress_bar=False)
+    gif.add_text_fragment("open")
+    gif.save(path)
+
+    with warnings.catch_warnings(record=True) as caught:
+        warnings.simplefilter("always", ResourceWarning)
+        # LED frames, and images when the colors do not match
+        for colors in (None, {"color_pixel_on_dark": "#00FF00"}):
+            GIF.open(path, progress_bar=False, color_config=colors)
+            gc.collect()
+    assert not [warning for warning in caught if warning.category is ResourceWarning]
+
+
+def test_generate_text_image_chunks(monkeypatch: pytest.MonkeyPatch):
+    text = "Long text, that is drawn in chunks!\nAnd the second line " * 3
+    gif = GIF(progress_bar=False)
+    gif.text_chunk_size = 1000
+    expected = gif.generate_text_image(text)
+    for chunk_size in (1, 7, 64):
+        gif.text_chunk_size = chunk_size
+        assert gif.generate_text_image(text) == expected
+
+    # The images drawn at once do not grow with the length of the text
+    sizes = []
+    new = Image.new
+
+    def recording_new(mode, size, *args, **kwargs):
+        sizes.append(size)
+        return new(mode, size, *args, **kwargs)
+
+    monkeypatch.setattr(Image, "new", recording_new)
+    gif.text_chunk_size = 8
+    text_image = gif.generate_text_image("long " * 1000)
+    assert text_image.size == (30565, 9)
+    # only the result is as large as the text
+    assert sorted(width * height for width, height in sizes)[-2] < 300 * 54
+
+    # nor with the number of lines
+    text = "\n".join(f"line {number} of many" for number in range(300))
+    gif.text_chunk_size = 1000
+    expected = gif.generate_text_image(text)
+    gif.text_chunk_size = 8
+    sizes.clear()
+    text_image = gif.generate_text_image(text)
+    assert text_image == expected
+    assert text_image.size[1] == 9 * 300
+    assert sorted(width * height for width, height in sizes)[-2] < 300 * 60
+    line_image = gif.generate_text_image("line 0 of many")
+    assert text_image.crop((0, 0, line_image.width, 9)) == line_image
+
+
+def test_font_chain(monkeypatch: pytest.MonkeyPatch):
+    gif = GIF(progress_bar=False)
+    # Monocraft has no typographic quotes, the font of Pillow has them
+    default_font = ImageFont.load_default()
+    assert isinstance(default_font, ImageFont.FreeTypeFont)
+    fallback = BytesIO(default_font.font_bytes)
+    chain: list[str | BytesIO] = [gif.default_font_path, fallback]
+    assert font_runs("say “hi”", chain) == [(0, "say "), (1, "“"), (0, "hi"), (1, "”")]
+
+    # the characters of the first font are drawn as before
+    assert gif.generate_text_image("say hi", chain) == gif.generate_text_image("say hi")
+    quoted = gif.generate_text_image("say “hi”", chain)
+    assert quoted != gif.generate_text_image("say “hi”")
+    say = gif.generate_text_image("say")
+    assert quoted.crop((0, 0, say.width, 9)) == say
+
+    # the cmap of each font is read once
+    def no_cmap(data):
+        raise AssertionError("The cmap is read again")
+
+    monkeypatch.setattr("gif._cmap_codepoints", no_cmap)
+    assert gif.generate_text_image("say “hi”", chain) == quoted
+    gif.generate_text_image("single font")
+
+    gif.add_text_fragment("“chain”", font_path=chain)
+    gif.save(BytesIO())
+
+
+@pytest.mark.parametrize("scale", (2, 3))
+def test_scale(scale: int):
+    gif = GIF(7, 4, progress_bar=False, scale=scale)
+    small = GIF(7, 4, progress_bar=False)
+    leds = bytes((0, 255, 128, 255) * 7)
+    frame = gif.generate_led_frame(leds)
+    assert frame.size == (small.columns_pixels * scale, small.rows_pixels * scale)
+    assert gif.generate_led_palette_frame(leds).convert("RGBA") == frame
+
+    # the LEDs are the LEDs of the small display scaled up
+    box = (7 * scale, 7 * scale, (7 + 7 * 3) * scale, (7 + 4 * 3) * scale)
+    assert frame.crop(box) == small.generate_led_frame(leds).crop(
+        (7, 7, 7 + 7 * 3, 7 + 4 * 3)
+    ).resize((7 * 3 * scale, 4 * 3 * scale), Image.Resampling.NEAREST)
+    on = gif.generate_frame(lambda column, row: (column + row) % 2 == 0)
+    assert on == gif.generate_led_frame(
+        bytes(
+            255 * ((column + row) % 2 == 0) for row in range(4) for column in range(7)
+        )
+    )
+
+    gif.add_text_fragment("scale")
+    frames = leds_frames(gif._fragments[0])
+    # The gif writer merges identical frames
+    shown = [leds for n, leds in enumerate(frames) if n == 0 or leds != frames[n - 1]]
+    files = []
+    for fast in (False, True):
+        file = BytesIO()
+        gif.save(file, fast=fast, clear=False)
+        files.append(file)
+        assert Image.open(file).size == frame.size
+    assert [leds for leds, _ in gif.extract_gif_leds(files[0])] == shown
+    assert [leds for leds, _ in gif.extract_gif_leds(files[1])] == shown
+
+
+def test_add_image_fragment_buffer():
+    # memoryview stands for a NumPy array, it has the same buffer protocol
+    columns, rows = 10, 4
+    pixels = bytearray(value * 8 % 256 for value in range(6 * columns * rows))
+    gif = GIF(columns, rows, progress_bar=False)
+
+    # one image
+    image = memoryview(pixels).cast("B", (rows, columns * 6))
+    gif.add_image_fragment(image, levels=4)
+    expected = gif.image_leds_frames(
+        Image.frombytes("L", (columns * 6, rows), bytes(pixels)), levels=4
+    )
+    assert [bytes(leds) for leds in gif._fragments[0].frames()] == expected
+
+    # a stack of frames
+    frames = memoryview(pixels).cast("B", (6, rows, columns))
+    gif.add_image_fragment(frames, speed=2)
+    tall = Image.frombytes("L", (columns, rows * 6), bytes(pixels))
+    assert [bytes(leds) for leds in gif._fragments[1].frames()] == [
+        gif.image_leds_frames(tall.crop((0, n * rows, columns, (n + 1) * rows)))[0]
+        for n in range(0, 6, 2)
+    ]
+
+    # RGB
+    size = columns * rows
+    colors = bytearray((0, 0, 0, 0, 255, 0)) * (size // 2)
+    gif.add_image_fragment(memoryview(colors).cast("B", (rows, columns, 3)))
+    assert [bytes(leds) for leds in gif._fragments[2].frames()] == [
+        bytes((255, 0)) * (size // 2)
+    ]
+
+    # the array can be filled with the next frames right after it is added
+    decoded = bytearray(size)
+    for value in (0, 255):
+        decoded[:] = bytes((value,)) * size
+        gif.add_image_fragment(
+            memoryview(decoded).cast("B", (1, rows, columns)), levels=4
+        )
+    *_, black, white = gif._fragments
+    assert [bytes(leds) for leds in black.frames()] == [bytes((255,)) * size]
+    assert [bytes(leds) for leds in white.frames()] == [bytes(size)]
+    gif.save(BytesIO())
@@ -0,0 +1,86 @@
+from io import BytesIO
+from pathlib import Path
+
+from gif import GIF, render_batch
+from tests.utils import ExceptionWrapper
+
+
+def save_text(text: str, **color_config: str) -> bytes:
+    gif = GIF(columns=20, rows=9, progress_bar=False)
+    gif.color_config.update(color_config)
+    gif.add_text_fragment(text, direction="right")
+    file = BytesIO()
+    gif.save(file)
+    return file.getvalue()
+
+
+def test_from_spec():
+    gif = GIF.from_spec(
+        {
+            "columns": 20,
+            "color_config": {"color_pixel_on_dark": "#00FF00"},
+            "fragments": [{"type": "text", "text": "spec", "direction": "right"}],
+        }
+    )
+    file = BytesIO()
+    gif.save(file)
+    assert file.getvalue() == save_text("spec", color_pixel_on_dark="#00FF00")
+
+    with ExceptionWrapper(ValueError("Unknown keys in the gif spec: ['size']")):
+        GIF.from_spec({"size": 1, "fragments": [{"type": "text", "text": "x"}]})
+    with ExceptionWrapper(ValueError("You have not added any fragments")):
+        GIF.from_spec({"fragments": []})
+    with ExceptionWrapper(
+        ValueError(
+            'Fragment type can only be one of "text", "image" or "gif". Not "video".'
+        )
+    ):
+        GIF.from_spec({"fragments": [{"type": "video"}]})
+
+
+def test_render_batch(tmp_path: Path):
+    texts = ["one", "two", "three"]
+    specs = [
+        {
+            "columns": 20,
+            "fragments": [{"type": "text", "text": text, "direction": "right"}],
+        }
+        for text in texts
+    ]
+    specs.append({"fragments": [{"type": "text", "txt": "error"}]})
+    specs.append(
+        {
+            "columns": 20,
+            "path": str(tmp_path / "four.gif"),
+            "fragments": [{"type": "text", "text": "four", "direction": "right"}],
+        }
+    )
+
+    for workers in (0, 2):
+        results = sorted(render_batch(specs, workers=workers), key=lambda r: r.index)
+        assert [result.data for result in results[:3]] == [
+            save_text(text) for text in texts
+        ]
+        assert all(result.ok for result in results[:3])
+        assert isinstance(results[3].error, TypeError)
+        assert results[4].ok and results[4].data is None
+        assert (tmp_path / "four.gif").read_bytes() == save_text("four")
+
+    with ExceptionWrapper(ValueError("workers must be greater than or equal to 0")):
+        list(render_batch(specs, workers=-1))
+
+
+def test_render_batch_stop(tmp_path: Path):
+    specs = [
+        {
+            "columns": 20,
+            "path": str(tmp_path / f"{number}.gif"),
+            "fragments": [{"type": "text", "text": "stop " * 20}],
+        }
+        for number in range(12)
+    ]
+    results = render_batch(specs, workers=1)
+    assert next(results).ok
+    results.close()
+    # the specs that were still waiting are not rendered
+    assert len(list(tmp_path.glob("*.gif"))) < len(specs)
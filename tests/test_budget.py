@@ -0,0 +1,101 @@
+from io import BytesIO
+from typing import Any
+
+# noinspection PyPackageRequirements
+import pytest
+from PIL import Image
+
+from gif import GIF, FrameBudget
+from tests.utils import ExceptionWrapper
+
+TEXT = "A long text that needs many frames "
+
+
+@pytest.mark.parametrize("direction", ("left", "right", "up", "down", "none"))
+@pytest.mark.parametrize("wrap", (False, True))
+@pytest.mark.parametrize("substeps, speed", ((1, 1), (1, 4), (3, 2)))
+def test_leds_frames_count(direction: str, wrap: bool, substeps: int, speed: int):
+    gif = GIF(columns=10, rows=9, progress_bar=False)
+    for text in ("a", "budget", "two\nlines"):
+        text_image = gif.generate_text_image(text)
+        size = gif.text_image_size(text)
+        assert size == text_image.size
+        padding = gif.text_padding(size, not wrap, not wrap, direction)
+        arguments: dict[str, Any] = dict(
+            speed=speed,
+            direction=direction,
+            wrap=wrap,
+            substeps=substeps,
+            padding=padding,
+        )
+        assert gif.leds_frames_count(size, **arguments) == len(
+            gif.image_leds_frames(text_image, **arguments)
+        )
+
+
+def test_budget_fragment():
+    gif = GIF(progress_bar=False)
+    gif.add_text_fragment(TEXT, duration=20, substeps=2, repeat=2)
+    frames, size = gif.estimate()
+    assert frames == len(gif._fragments[0])
+
+    gif.clear_fragments()
+    gif.add_text_fragment(
+        TEXT, duration=20, substeps=2, repeat=2, budget=FrameBudget(max_frames=100)
+    )
+    (fragment,) = gif._fragments
+    factor = fragment.definition["speed"]
+    assert factor > 1
+    # the text moves by as many LEDs per second
+    assert fragment.definition["duration"] == 20 * factor
+    # counted before drawing
+    assert not fragment.realized
+    assert gif.estimate()[0] == len(fragment) <= 100
+    # and the least step that fits
+    gif.add_text_fragment(TEXT, speed=factor - 1, substeps=2, repeat=2)
+    assert gif.estimate()[0] - len(fragment) > 100
+
+    # the frames of a stack of images
+    gif = GIF(10, 9, progress_bar=False)
+    video = memoryview(bytearray(30 * 9 * 10)).cast("B", (30, 9, 10))
+    gif.add_image_fragment(video, duration=40, budget=FrameBudget(max_frames=12))
+    (fragment,) = gif._fragments
+    assert (fragment.definition["speed"], fragment.definition["duration"]) == (3, 120)
+    assert len(fragment) == 10
+
+
+def test_budget_save():
+    gif = GIF(progress_bar=False)
+    gif.add_text_fragment(TEXT)
+    gif.add_image_fragment(Image.new("RGB", (79 * 3, 9), "#FFFFFF"))
+    frames, size = gif.estimate()
+
+    file = BytesIO()
+    gif.save(file, clear=False, budget=FrameBudget(max_bytes=size // 3))
+    factors = {fragment.definition["speed"] for fragment in gif._fragments}
+    assert len(factors) == 1 and factors != {1}
+    new_frames, new_size = gif.estimate()
+    assert new_size <= size // 3
+    assert Image.open(file).n_frames <= new_frames < frames
+
+    # nothing changes when the gif fits
+    gif.save(BytesIO(), clear=False, budget=FrameBudget(max_frames=new_frames))
+    assert {fragment.definition["speed"] for fragment in gif._fragments} == factors
+
+
+def test_budget_exceptions():
+    with ExceptionWrapper(ValueError("max_frames must be greater than or equal to 1")):
+        FrameBudget(max_frames=0)
+
+    with ExceptionWrapper(ValueError("max_bytes must be greater than or equal to 0")):
+        FrameBudget(max_bytes=-1)
+
+    gif = GIF(progress_bar=False)
+    gif.add_text_fragment("one")
+    gif.add_text_fragment("two")
+    with ExceptionWrapper(
+        ValueError(
+            "The frames do not fit into the budget: 2 are needed at least, 1 are allowed"
+        )
+    ):
+        gif.save(BytesIO(), budget=FrameBudget(max_frames=1))
@@ -0,0 +1,59 @@
+import os
+from io import BytesIO
+from pathlib import Path
+
+from gif import GIF, RenderCache
+from tests.utils import ExceptionWrapper
+
+
+def save_text(text: str, cache: RenderCache | None = None) -> bytes:
+    gif = GIF(progress_bar=False, cache=cache)
+    gif.add_text_fragment(text, direction="right", repeat=2)
+    file = BytesIO()
+    gif.save(file)
+    return file.getvalue()
+
+
+def test_cache(tmp_path: Path):
+    cache = RenderCache(tmp_path)
+    expected = save_text("cache")
+
+    # miss
+    assert save_text("cache", cache) == expected
+    assert len(list(tmp_path.glob("*.leds"))) == 1
+
+    # hit
+    gif = GIF(progress_bar=False, cache=cache)
+    gif.generate_text_image = None  # type: ignore
+    gif.add_text_fragment("cache", direction="right", repeat=2)
+    file = BytesIO()
+    gif.save(file)
+    assert file.getvalue() == expected
+
+    # another board size is another entry
+    gif = GIF(columns=20, progress_bar=False, cache=cache)
+    gif.add_text_fragment("cache", direction="right")
+    gif.save(BytesIO())
+    assert len(list(tmp_path.glob("*.leds"))) == 2
+
+    cache.clear()
+    assert not list(tmp_path.glob("*.leds"))
+
+
+def test_cache_eviction(tmp_path: Path):
+    cache = RenderCache(tmp_path, max_size=0)
+    save_text("evicted", cache)
+    assert not list(tmp_path.glob("*"))
+
+    cache.max_size = 10 * 1024 * 1024
+    save_text("one", cache)
+    (first,) = tmp_path.glob("*.leds")
+    os.utime(first, (0, 0))
+    cache.max_size = first.stat().st_size
+    save_text("two", cache)
+    assert not first.exists()
+    assert len(list(tmp_path.glob("*.leds"))) == 1
+    assert save_text("two", cache) == save_text("two")
+
+    with ExceptionWrapper(ValueError("max_size must be greater than or equal to 0")):
+        RenderCache(tmp_path, max_size=-1)
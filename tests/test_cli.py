@@ -0,0 +1,104 @@
+import os
+import json
+import shutil
+from pathlib import Path
+
+# noinspection PyPackageRequirements
+import pytest
+
+from gif import GIF, main
+from tests.utils import ExceptionWrapper
+
+
+def write_manifest(tmp_path: Path, text: str) -> Path:
+    manifest = tmp_path / "manifest.json"
+    manifest.write_text(
+        json.dumps(
+            {
+                "defaults": {"columns": 20, "default_font_path": "font.otf"},
+                "outputs": [
+                    {
+                        "path": "out/one.gif",
+                        "fragments": [{"type": "text", "text": text}],
+                    },
+                    {
+                        "path": ["out/two.gif", "out/two.png"],
+                        "fragments": [{"type": "text", "text": "two"}],
+                    },
+                ],
+            }
+        )
+    )
+    return manifest
+
+
+def test_cli_render(tmp_path: Path, capsys: pytest.CaptureFixture):
+    font = tmp_path / "font.otf"
+    shutil.copy(GIF.default_font_path, font)
+    manifest = write_manifest(tmp_path, "one")
+
+    assert main(["render", str(manifest)]) == 0
+    assert "2 rendered, 0 skipped, 0 failed" in capsys.readouterr().out
+    for name in ("one.gif", "two.gif", "two.png"):
+        assert (tmp_path / "out" / name).exists()
+
+    # Only the mtime of the font has changed
+    os.utime(font, (0, 0))
+    assert main(["render", str(manifest)]) == 0
+    assert "0 rendered, 2 skipped, 0 failed" in capsys.readouterr().out
+
+    write_manifest(tmp_path, "changed")
+    assert main(["render", str(manifest), "-j", "1"]) == 0
+    assert "1 rendered, 1 skipped, 0 failed" in capsys.readouterr().out
+
+    (tmp_path / "out" / "two.png").unlink()
+    assert main(["render", str(manifest)]) == 0
+    assert "1 rendered, 1 skipped, 0 failed" in capsys.readouterr().out
+
+    font.write_bytes(font.read_bytes() + b"\0")
+    assert main(["render", str(manifest), "--force"]) == 0
+    assert "2 rendered, 0 skipped, 0 failed" in capsys.readouterr().out
+
+
+def test_cli_errors(tmp_path: Path, capsys: pytest.CaptureFixture):
+    manifest = tmp_path / "manifest.json"
+    manifest.write_text(
+        json.dumps(
+            {
+                "outputs": [
+                    {
+                        "path": "error.gif",
+                        "fragments": [{"type": "image", "image_path": "missing.png"}],
+                    }
+                ]
+            }
+        )
+    )
+    assert main(["render", str(manifest)]) == 1
+    assert "FileNotFoundError" in capsys.readouterr().err
+
+    manifest.write_text(json.dumps({"outputs": [{"fragments": []}]}))
+    with ExceptionWrapper(ValueError("Every output of the manifest must have a path")):
+        main(["render", str(manifest)])
+
+
+def test_cli_toml(tmp_path: Path):
+    manifest = tmp_path / "manifest.toml"
+    manifest.write_text(f"""
+[[outputs]]
+path = "text.gif"
+default_font_path = {json.dumps(os.path.abspath(GIF.default_font_path))}
+
+[[outputs.fragments]]
+type = "text"
+text = "toml"
+""")
+    try:
+        import tomllib  # noqa: F401
+    except ImportError:
+        with ExceptionWrapper(ValueError("TOML manifests need Python 3.11 or newer")):
+            main(["render", str(manifest)])
+        return
+
+    assert main(["render", str(manifest)]) == 0
+    assert (tmp_path / "text.gif").exists()
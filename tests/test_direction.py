@@ -1,8 +1,9 @@
 # noinspection PyPackageRequirements
 import pytest
+from PIL import Image
 
 from gif import GIF
-from tests.utils import compare_gif
+from tests.utils import compare_gif, leds_frames
 
 
 @pytest.mark.parametrize(
@@ -96,3 +97,75 @@ def test_direction(num: int, intro: bool, outro: bool, durations: tuple):
     path = f"tests/result_images/test_direction/{num}/test_direction_{num}_{intro}_{outro}.gif"
     # gif.save(path)
     assert compare_gif(gif, path)
+
+
+@pytest.mark.parametrize("direction", ("left", "right", "up", "down"))
+def test_direction_wrap(direction: str):
+    gif = GIF(columns=10, rows=9, progress_bar=False)
+    gif.add_text_fragment("wrap around ", direction=direction, wrap=True)
+    gif.add_text_fragment("wrap around ", direction=direction, intro=True, outro=True)
+    wrapped, scrolled = gif._fragments
+    frames = leds_frames(wrapped)
+
+    # one turn, shorter than scrolling in and out
+    assert len(set(frames)) == len(frames)
+    assert len(frames) < len(scrolled)
+    # every frame, the last one included, moves the previous one by one LED
+    images = [Image.frombytes("L", (10, 9), frame) for frame in frames]
+    for previous, image in zip(images, images[1:] + images[:1]):
+        match direction:
+            case "left":
+                assert previous.crop((1, 0, 10, 9)) == image.crop((0, 0, 9, 9))
+            case "right":
+                assert previous.crop((0, 0, 9, 9)) == image.crop((1, 0, 10, 9))
+            case "up":
+                assert previous.crop((0, 1, 10, 9)) == image.crop((0, 0, 10, 8))
+            case "down":
+                assert previous.crop((0, 0, 10, 8)) == image.crop((0, 1, 10, 9))
+
+
+@pytest.mark.parametrize("direction", ("left", "right", "up", "down"))
+def test_direction_substeps(direction: str):
+    gif = GIF(columns=10, rows=9, progress_bar=False)
+    gif.add_text_fragment("smooth", direction=direction, substeps=4)
+    gif.add_text_fragment("smooth", direction=direction)
+    smooth, steps = gif._fragments
+    frames = leds_frames(smooth)
+
+    # every fourth frame is a whole position, the LEDs between them are dimmed
+    assert len(frames) == len(steps) * 4
+    assert frames[::4] == leds_frames(steps)
+    middle = len(frames) // 8 * 4
+    assert set(frames[middle + 1]) - {0, 255}
+
+    dimmed = gif.generate_led_frame(frames[middle + 1]).getcolors()
+    whole = gif.generate_led_frame(frames[middle]).getcolors()
+    assert dimmed is not None and whole is not None
+    assert len(dimmed) > len(whole)
+
+
+@pytest.mark.parametrize("direction", ("left", "right", "up", "down", "none"))
+@pytest.mark.parametrize("intro, outro", ((True, True), (False, True), (False, False)))
+@pytest.mark.parametrize("substeps", (1, 3))
+def test_direction_padding(direction: str, intro: bool, outro: bool, substeps: int):
+    gif = GIF(columns=10, rows=9, progress_bar=False)
+    text_image = gif.generate_text_image("pad")
+    padded = gif.process_text_image(text_image, intro, outro, direction)
+    padding = gif.text_padding(text_image.size, intro, outro, direction)
+
+    # the frames are cut as if the padding were there
+    left, top, right, bottom = padding
+    assert padded.size == (
+        left + text_image.width + right,
+        top + text_image.height + bottom,
+    )
+    for wrap in (False, True):
+        assert gif.image_leds_frames(
+            text_image,
+            direction=direction,
+            substeps=substeps,
+            wrap=wrap,
+            padding=padding,
+        ) == gif.image_leds_frames(
+            padded, direction=direction, substeps=substeps, wrap=wrap
+        )
@@ -1,6 +1,6 @@
 from PIL import Image
 
-from gif import GIF
+from gif import GIF, Fragment
 from tests.utils import ExceptionWrapper
 
 
@@ -11,6 +11,9 @@ def test_exceptions():
     with ExceptionWrapper(ValueError("Minimum height = 1")):
         GIF(rows=0)
 
+    with ExceptionWrapper(ValueError("scale must be greater than or equal to 1")):
+        GIF(scale=0)
+
     with ExceptionWrapper(ValueError("loop must be greater than or equal to 0")):
         GIF(loop=-1)
 
@@ -32,13 +35,7 @@ def test_exceptions():
 
     with ExceptionWrapper(ValueError("You have not added any fragments")):
         gif = GIF(save_path="path")
-        gif._fragments.append(
-            (  # noqa
-                (i for i in range(1)),
-                (i for i in range(1)),
-                0,
-            )
-        )
+        gif._fragments.append(Fragment(lambda: ([], [])))
         gif.save("path")
 
     with ExceptionWrapper(ValueError("save_path should not be None")):
@@ -64,6 +61,36 @@ def test_exceptions():
     with ExceptionWrapper(ValueError("repeat must be greater than or equal to 1")):
         GIF().add_gif_fragment(Image.new("RGB", (1, 1)), repeat=0)
 
+    with ExceptionWrapper(ValueError("substeps must be greater than or equal to 1")):
+        GIF().add_text_fragment("", substeps=0)
+
+    with ExceptionWrapper(ValueError("substeps must be greater than or equal to 1")):
+        GIF().add_image_fragment(Image.new("RGB", (79, 9)), substeps=0)
+
+    with ExceptionWrapper(ValueError('The array must be of uint8, not "H"')):
+        GIF().add_image_fragment(memoryview(bytearray(4)).cast("H", (1, 2)))
+
+    with ExceptionWrapper(
+        ValueError(
+            "The array must be (rows, columns), (rows, columns, 3 or 4) "
+            "or a stack of them, not (3,)"
+        )
+    ):
+        GIF().add_image_fragment(b"abc")
+
+    with ExceptionWrapper(
+        ValueError(
+            "The size of the frames does not match the size of the current gif "
+            "(79, 8) != (79, 9)"
+        )
+    ):
+        GIF().add_image_fragment(
+            memoryview(bytearray(2 * 8 * 79)).cast("B", (2, 8, 79))
+        )
+
+    with ExceptionWrapper(ValueError("levels must be between 2 and 256")):
+        GIF().add_image_fragment(Image.new("RGB", (79, 9)), levels=1)
+
     with ExceptionWrapper(ValueError("The debug_path must point to a file")):
         GIF().debug_path = "tests/debug_images/"
 
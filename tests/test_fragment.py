@@ -0,0 +1,52 @@
+from io import BytesIO
+
+from PIL import Image
+
+from gif import GIF, Fragment
+
+
+def test_lazy_fragment():
+    gif = GIF(progress_bar=False)
+    gif.generate_text_image = None  # type: ignore
+    gif.add_text_fragment("removed")
+    gif.add_text_fragment("cleared")
+    gif.remove_fragment(0)
+    gif.clear_fragments()
+
+    gif = GIF(progress_bar=False)
+    gif.add_text_fragment("text")
+    gif.add_image_fragment("readme_content/frog_jump.png", speed=21)
+    assert not any(fragment.realized for fragment in gif._fragments)
+
+    with BytesIO() as temp_file:
+        with GIF(save_path=temp_file, progress_bar=False) as temp_gif:
+            temp_gif.add_text_fragment("gif", intro=False, outro=False)
+
+        temp_file.seek(0)
+        gif.add_gif_fragment(temp_file, repeat=2)
+
+    # The file is closed, but the fragment has a copy of it.
+    assert len(gif._fragments[2]) == 2
+    assert gif._fragments[2].realized
+    assert not gif._fragments[0].realized
+    gif.save(BytesIO())
+
+
+def test_fragment():
+    frames = [bytes([0, 255]), bytes([255, 0])]
+    calls = []
+
+    def build():
+        calls.append(None)
+        return frames, [10, 20]
+
+    fragment = Fragment(build, repeat=2, type="test")
+    assert repr(fragment) == "Fragment(type='test', repeat=2)"
+    assert len(fragment) == 4
+    assert list(fragment.frames()) == frames * 2
+    assert list(fragment.durations()) == [10, 20, 10, 20]
+    assert len(calls) == 1
+
+    image = Image.new("RGB", (1, 1))
+    assert GIF(2, 1).frame_image(image) is image
+    assert GIF(2, 1).frame_image(frames[0]).size == (19, 16)
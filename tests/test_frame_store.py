@@ -0,0 +1,62 @@
+from io import BytesIO
+from pathlib import Path
+
+from gif import GIF, FrameStore
+from tests.utils import ExceptionWrapper
+
+
+def test_frame_store(tmp_path: Path):
+    with FrameStore(3, 2, tmp_path / "frames", chunk_frames=1) as store:
+        assert store.chunk_records > 1
+        indexes = store.extend(
+            [bytes([n % 256] * 6) for n in range(store.chunk_records + 1)], 40
+        )
+        store.append(bytes(range(6)), 100)
+
+        assert len(store) == store.chunk_records + 2
+        assert indexes == range(store.chunk_records + 1)
+        assert bytes(store.leds(store.chunk_records)) == bytes(
+            [store.chunk_records % 256] * 6
+        )
+        assert store.duration(store.chunk_records) == 40
+        assert bytes(store.leds(len(store) - 1)) == bytes(range(6))
+        assert store.duration(len(store) - 1) == 100
+
+        with ExceptionWrapper(IndexError("frame index out of range")):
+            store.leds(len(store))
+
+        with ExceptionWrapper(
+            ValueError(
+                "The size of this frame does not match the size of the store 5 != 6"
+            )
+        ):
+            store.append(bytes(5), 0)
+
+    with ExceptionWrapper(
+        ValueError("chunk_frames must be greater than or equal to 1")
+    ):
+        FrameStore(3, 2, chunk_frames=0)
+
+
+def test_gif_frame_store():
+    expected = BytesIO()
+    gif = GIF(progress_bar=False)
+    gif.add_text_fragment("frame store", duration=30, repeat=2)
+    gif.add_text_fragment("up", direction="up")
+    gif.save(expected)
+
+    with FrameStore(79, 9) as store:
+        gif = GIF(progress_bar=False, frame_store=store)
+        gif.add_text_fragment("frame store", duration=30, repeat=2)
+        gif.add_text_fragment("up", direction="up")
+        file = BytesIO()
+        gif.save(file)
+        assert file.getvalue() == expected.getvalue()
+
+        with ExceptionWrapper(
+            ValueError(
+                "The size of the frame store does not match the size of the current gif "
+                "(79, 9) != (20, 9)"
+            )
+        ):
+            GIF(20, frame_store=store)
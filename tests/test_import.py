@@ -0,0 +1,46 @@
+import os
+import sys
+import subprocess
+
+# `import gif` must stay within this budget, measured with `python -X importtime`.
+# It is several times the usual time, so that slow CI machines pass.
+IMPORT_TIME_BUDGET = 0.15  # seconds
+# Modules that only some features need are imported where they are used
+DEFERRED_MODULES = (
+    "PIL.ImageFont",
+    "PIL.ImageDraw",
+    "http.server",
+    "concurrent.futures",
+    "argparse",
+    "json",
+    "hashlib",
+    "pathlib",
+)
+
+
+def import_gif() -> tuple[float, set[str]]:
+    env = os.environ.copy()
+    env.pop("PYTHONDONTWRITEBYTECODE", None)
+    result = subprocess.run(
+        [
+            sys.executable,
+            "-X",
+            "importtime",
+            "-c",
+            "import sys, gif; print(' '.join(sys.modules))",
+        ],
+        capture_output=True,
+        text=True,
+        check=True,
+        env=env,
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    )
+    (line,) = (line for line in result.stderr.splitlines() if line.endswith("| gif"))
+    return int(line.split("|")[1]) / 1_000_000, set(result.stdout.split())
+
+
+def test_import_time():
+    import_gif()  # compiles gif.py
+    seconds, modules = import_gif()
+    assert not modules & set(DEFERRED_MODULES)
+    assert seconds < IMPORT_TIME_BUDGET
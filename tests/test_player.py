@@ -0,0 +1,116 @@
+import time
+import threading
+from itertools import islice
+
+from PIL import Image
+
+from gif import GIF, Fragment, Player
+from tests.utils import ExceptionWrapper
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float):
+        self.now += seconds
+
+
+def create_gif() -> GIF:
+    gif = GIF(columns=10, rows=9, progress_bar=False)
+    gif.add_text_fragment("play", duration=20)
+    return gif
+
+
+def test_player():
+    gif = create_gif()
+    leds_frames = [bytes(leds) for leds in gif._fragments[0].frames()]
+    clock = Clock()
+
+    player = Player(
+        gif, images=False, loop=1, lookahead=0, clock=clock, sleep=clock.sleep
+    )
+    assert [bytes(leds) for leds in player] == leds_frames
+    assert round(clock.now, 6) == (len(leds_frames) - 1) * 0.02
+    assert player.stats() == {
+        "shown": len(leds_frames),
+        "dropped": 0,
+        "late": 0,
+        "max_jitter": 0.0,
+        "mean_jitter": 0.0,
+    }
+
+    # The consumer needs 50 ms for each frame of 20 ms
+    clock = Clock()
+    player = Player(
+        gif, images=False, loop=1, lookahead=0, clock=clock, sleep=clock.sleep
+    )
+    for _ in player:
+        clock.sleep(0.05)
+    stats = player.stats()
+    assert stats["shown"] + stats["dropped"] == len(leds_frames)
+    assert stats["dropped"] > stats["shown"] > 0
+    assert stats["late"] > 0
+    assert 0 < stats["max_jitter"] < 0.02
+
+
+def test_player_lookahead():
+    gif = create_gif()
+    count = len(gif._fragments[0])
+
+    player = Player(gif, loop=2, lookahead=2, clock=lambda: 0.0, sleep=lambda _: None)
+    frames = list(player)
+    assert len(frames) == count * 2
+    assert all(isinstance(frame, Image.Image) for frame in frames)
+    assert frames[0] == gif.frame_image(next(gif._fragments[0].frames()))
+
+    # Infinite loop, the background thread stops with the generator
+    player = Player(gif, loop=0, lookahead=1, clock=lambda: 0.0, sleep=lambda _: None)
+    playing = iter(player)
+    assert len(list(islice(playing, count + 5))) == count + 5
+    playing.close()  # type: ignore[attr-defined]
+
+    # Stopping at the end of the timeline, while the queue is full
+    def stop_early():
+        player = Player(
+            gif, loop=1, lookahead=2, clock=lambda: 0.0, sleep=lambda _: None
+        )
+        playing = iter(player)
+        list(islice(playing, count - 2))
+        # the last two frames fill the queue, the end of the timeline waits
+        time.sleep(0.3)
+        playing.close()  # type: ignore[attr-defined]
+
+    thread = threading.Thread(target=stop_early, daemon=True)
+    thread.start()
+    thread.join(5)
+    assert not thread.is_alive()
+
+    with ExceptionWrapper(ValueError("lookahead must be greater than or equal to 0")):
+        Player(gif, lookahead=-1)
+    with ExceptionWrapper(ValueError("loop must be greater than or equal to 0")):
+        Player(gif, loop=-1)
+
+
+def test_player_lazy():
+    gif = create_gif()
+    gif.add_text_fragment("later", duration=20)
+    first, second = gif._fragments
+    player = Player(
+        gif, images=False, loop=1, lookahead=0, clock=lambda: 0.0, sleep=lambda _: None
+    )
+    playing = iter(player)
+    next(playing)
+    # the next fragment is built when the timeline reaches it
+    assert first.realized and not second.realized
+    assert len(list(playing)) == len(first) + len(second) - 1
+    assert second.realized
+
+    # an infinite loop of fragments without frames ends
+    gif = GIF(columns=10, rows=9, progress_bar=False)
+    gif._fragments.append(Fragment(lambda: ([], [])))
+    assert list(Player(gif, loop=0, lookahead=0)) == []
+    assert list(Player(gif, loop=0, lookahead=1)) == []
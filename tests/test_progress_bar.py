@@ -5,7 +5,7 @@ import pytest
 from io import StringIO, BytesIO
 from contextlib import redirect_stdout
 
-from gif import GIF
+from gif import GIF, Progress, render_batch
 
 
 @pytest.mark.parametrize(
@@ -27,6 +27,8 @@ def test_progress_bar(loop: int, repeat: int):
     file = BytesIO()
 
     gif = GIF(6, loop=loop, default_font_path="./fonts/Monocraft.otf")
+    # Every frame, the updates are not limited
+    gif.progress_interval = 0
     gif.add_text_fragment("12", intro=False, outro=False, repeat=repeat)
 
     with redirect_stdout(stdout_file):
@@ -35,19 +37,16 @@ def test_progress_bar(loop: int, repeat: int):
     stdout_file.seek(0)
     test_output = replace_time(stdout_file.read().strip()).splitlines()
     if repeat == 1:
-        output = replace_time(
-            f"""
+        output = replace_time(f"""
 [                                                  ][0/5 frames][  0%][ 0.00s][{file}]
 [██████████                                        ][1/5 frames][ 20%][ 0.00s][{file}]
 [████████████████████                              ][2/5 frames][ 40%][ 0.00s][{file}]
 [██████████████████████████████                    ][3/5 frames][ 60%][ 0.00s][{file}]
 [████████████████████████████████████████          ][4/5 frames][ 80%][ 0.00s][{file}]
 [██████████████████████████████████████████████████][5/5 frames][100%][ 0.00s][{file}]
-""".strip()
-        ).splitlines()
+""".strip()).splitlines()
     else:
-        output = replace_time(
-            f"""
+        output = replace_time(f"""
 [                                                  ][ 0/10 frames][  0%][ 0:00s][{file}]
 [█████                                             ][ 1/10 frames][ 10%][ 0:00s][{file}]
 [██████████                                        ][ 2/10 frames][ 20%][ 0:00s][{file}]
@@ -59,6 +58,35 @@ def test_progress_bar(loop: int, repeat: int):
 [████████████████████████████████████████          ][ 8/10 frames][ 80%][ 0:00s][{file}]
 [█████████████████████████████████████████████     ][ 9/10 frames][ 90%][ 0:00s][{file}]
 [██████████████████████████████████████████████████][10/10 frames][100%][ 0:00s][{file}]
-""".strip()
-        ).splitlines()
+""".strip()).splitlines()
     assert test_output == output
+
+
+def test_progress():
+    now = 0.0
+    reports = []
+
+    def callback(progress: Progress):
+        reports.append((progress.done, progress.fps, progress.eta))
+
+    progress = Progress(10, callback, interval=1, clock=lambda: now)
+    progress.update(0)
+    for _ in range(10):
+        now += 0.25
+        progress.update()
+    # At most once a second, the first and the last updates are always reported
+    assert reports == [(0, 0.0, None), (4, 4.0, 1.5), (8, 4.0, 0.5), (10, 4.0, 0.0)]
+
+
+def test_progress_callback():
+    reports = []
+    gif = GIF(6, progress_bar=lambda progress: reports.append(progress.done))
+    gif.add_text_fragment("12", intro=False, outro=False, repeat=2)
+    gif.save(BytesIO(), fast=True)
+    assert reports[0] == 0
+    assert reports[-1] == 10
+
+    reports.clear()
+    specs = [{"columns": 6, "fragments": [{"type": "text", "text": "1"}]}] * 3
+    assert len(list(render_batch(specs, workers=0, progress=reports.append))) == 3
+    assert reports[-1].done == reports[-1].total == 3
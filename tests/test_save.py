@@ -0,0 +1,217 @@
+from io import BytesIO
+from pathlib import Path
+
+from PIL import Image
+
+from gif import GIF, join_segments
+from tests.utils import ExceptionWrapper
+
+
+def test_save_keep_fragments(tmp_path: Path):
+    expected = BytesIO()
+    gif = GIF(progress_bar=False)
+    gif.add_text_fragment("save", repeat=2)
+    gif.save(expected)
+    assert not gif._fragments
+
+    gif = GIF(progress_bar=False)
+    gif.add_text_fragment("save", repeat=2)
+    first = BytesIO()
+    gif.save(first, clear=False)
+    assert first.getvalue() == expected.getvalue()
+    assert len(gif._fragments) == 1
+
+    # Nothing has changed, the encoded gif is written again.
+    gif.generate_led_frame = None  # type: ignore
+    second = BytesIO()
+    gif.save(second, clear=False)
+    assert second.getvalue() == expected.getvalue()
+
+    # The colors have changed, the fragments are not built again.
+    del gif.generate_led_frame
+    gif.generate_text_image = None  # type: ignore
+    gif.color_config["color_pixel_on_dark"] = "#00FF00"
+    third = BytesIO()
+    gif.save(third)
+    assert third.getvalue() != expected.getvalue()
+    assert not gif._fragments
+
+
+def test_save_several_sinks(tmp_path: Path):
+    expected = BytesIO()
+    gif = GIF(progress_bar=False)
+    gif.add_text_fragment("sinks")
+    gif.save(expected)
+
+    gif = GIF(progress_bar=False)
+    gif.add_text_fragment("sinks")
+    file = BytesIO()
+    gif.save([file, str(tmp_path / "sinks.gif"), tmp_path / "sinks.png"])
+
+    assert file.getvalue() == expected.getvalue()
+    assert (tmp_path / "sinks.gif").read_bytes() == expected.getvalue()
+    with Image.open(tmp_path / "sinks.png") as png, Image.open(expected) as gif_file:
+        assert png.format == "PNG"
+        assert getattr(png, "n_frames") == getattr(gif_file, "n_frames")
+
+
+def decoded_frames(file: BytesIO) -> list[tuple[bytes, int]]:
+    """
+    Frames as they are shown, identical consecutive frames are merged.
+    """
+    frames: list[tuple[bytes, int]] = []
+    for frame, duration in GIF.extract_gif_frames(Image.open(file)):
+        data = frame.convert("RGBA").tobytes()
+        if frames and frames[-1][0] == data:
+            frames[-1] = (data, frames[-1][1] + duration)
+        else:
+            frames.append((data, duration))
+    return frames
+
+
+def save_fragments(texts: list[str]) -> BytesIO:
+    gif = GIF(progress_bar=False)
+    for text in texts:
+        gif.add_text_fragment(text, direction="right")
+    gif.add_text_fragment("repeat", direction="up", repeat=2)
+    file = BytesIO()
+    gif.save(file)
+    return file
+
+
+def test_save_incremental():
+    gif = GIF(progress_bar=False)
+    for text in ("one", "two", "three"):
+        gif.add_text_fragment(text, direction="right")
+    gif.add_text_fragment("repeat", direction="up", repeat=2)
+    file = BytesIO()
+    gif.save(file, clear=False, incremental=True)
+    assert file.getvalue() != save_fragments(["one", "two", "three"]).getvalue()
+    assert decoded_frames(file) == decoded_frames(
+        save_fragments(["one", "two", "three"])
+    )
+
+    drawn = []
+    generate_led_palette_frame = gif.generate_led_palette_frame
+
+    def count_frames(leds):
+        drawn.append(leds)
+        return generate_led_palette_frame(leds)
+
+    gif.generate_led_palette_frame = count_frames  # type: ignore
+
+    # Only the new fragments are encoded
+    gif.remove_fragment(1)
+    assert gif.add_text_fragment("new", direction="right", index=1) == 1
+    assert gif.add_text_fragment("end", direction="right", index=-1) == 3
+    file = BytesIO()
+    gif.save(file, clear=False, incremental=True)
+    assert len(drawn) == len(gif._fragments[1]) + len(gif._fragments[3])
+    assert decoded_frames(file) == decoded_frames(
+        save_fragments(["one", "new", "three", "end"])
+    )
+
+    with ExceptionWrapper(ValueError("Fragment index out of range: 9")):
+        gif.add_text_fragment("out", index=9)
+
+    # Clearing the fragments would throw away what was encoded
+    with ExceptionWrapper(
+        ValueError(
+            "incremental needs clear=False, the encoded fragments are removed with the fragments"
+        )
+    ):
+        gif.save(BytesIO(), incremental=True)
+    assert len(gif._fragments) == 5
+
+
+def test_save_levels():
+    gradient = Image.linear_gradient("L").resize((79, 9)).convert("RGB")
+    gif = GIF(progress_bar=False)
+    gif.add_image_fragment(gradient, direction="none", levels=4)
+    gif.add_image_fragment(gradient, direction="none", levels=16)
+    gif.add_text_fragment("smooth", substeps=3)
+    levels = set(bytes(next(gif._fragments[0].frames())))
+    assert sorted(levels) == [0, 85, 170, 255]
+
+    # Dimmed LEDs have the same colors in the palette of the incremental gif
+    incremental_file = BytesIO()
+    gif.save(incremental_file, clear=False, incremental=True)
+    file = BytesIO()
+    gif.save(file)
+    assert decoded_frames(incremental_file) == decoded_frames(file)
+
+
+def test_save_levels_exact():
+    gradient = Image.linear_gradient("L").resize((79, 9)).convert("RGB")
+    gif = GIF(progress_bar=False)
+    gif.add_image_fragment(gradient, direction="none", levels=16)
+    gif.add_text_fragment("smooth", substeps=3)
+    leds_frames = [
+        bytes(leds) for fragment in gif._fragments for leds in fragment.frames()
+    ]
+    file = BytesIO()
+    gif.save(file)
+
+    # Dimmed LEDs are written with the exact colors without fast or incremental
+    frames = GIF.extract_gif_frames(Image.open(file))
+    assert [frame.convert("RGBA").tobytes() for frame, _ in frames] == [
+        gif.generate_led_frame(leds).tobytes() for leds in leds_frames
+    ]
+
+
+def test_save_fast():
+    def fragments() -> GIF:
+        gif = GIF(progress_bar=False)
+        gif.add_text_fragment("fast", direction="right")
+        gif.add_text_fragment("repeat", direction="up", repeat=2)
+        gif.add_text_fragment("still", direction="none", repeat=3)
+        return gif
+
+    fast_file = BytesIO()
+    fragments().save(fast_file, fast=True)
+    file = BytesIO()
+    fragments().save(file)
+    assert fast_file.getvalue() != file.getvalue()
+    assert decoded_frames(fast_file) == decoded_frames(file)
+
+    # Dimmed LEDs are written with the exact colors
+    gif = GIF(progress_bar=False)
+    gif.add_text_fragment("smooth", substeps=2, intro=False, outro=False)
+    leds_frames = [bytes(leds) for leds in gif._fragments[0].frames()]
+    fast_file = BytesIO()
+    gif.save(fast_file, fast=True)
+    frames = GIF.extract_gif_frames(Image.open(fast_file))
+    assert [frame.convert("RGBA").tobytes() for frame, _ in frames] == [
+        gif.generate_led_frame(leds).tobytes() for leds in leds_frames
+    ]
+
+
+def test_save_segments(tmp_path: Path):
+    def fragments() -> GIF:
+        gif = GIF(progress_bar=False, loop=3)
+        gif.add_text_fragment("segments", direction="right")
+        gif.add_text_fragment("repeat", direction="up", repeat=3)
+        gif.add_text_fragment("still", direction="none", repeat=2)
+        return gif
+
+    file = BytesIO()
+    fragments().save(file, fast=True)
+
+    # The segments are encoded in parallel and joined into the same file
+    parallel_file = BytesIO()
+    fragments().save(parallel_file, fast=True, workers=2)
+    assert parallel_file.getvalue() == file.getvalue()
+
+    # or on different machines
+    paths = [tmp_path / f"{index}.segment" for index in range(3)]
+    for index, path in reversed(list(enumerate(paths))):
+        fragments().save_segment(path, index, 3)
+    joined_file = BytesIO()
+    join_segments(paths, joined_file)
+    assert joined_file.getvalue() == file.getvalue()
+    assert Image.open(joined_file).info["loop"] == 3
+
+    with ExceptionWrapper(ValueError("Segments are missing: [1]")):
+        join_segments(paths[::2], BytesIO())
+    with ExceptionWrapper(ValueError("Segment index out of range: 3")):
+        fragments().save_segment(paths[0], 3, 3)
@@ -0,0 +1,133 @@
+import json
+import socket
+import multiprocessing
+import threading
+from io import BytesIO
+from pathlib import Path
+from http.client import HTTPConnection
+
+# noinspection PyPackageRequirements
+import pytest
+
+import gif
+from gif import GIF, RenderServer
+from tests.utils import ExceptionWrapper
+
+SPEC = {"columns": 20, "fragments": [{"type": "text", "text": "server"}]}
+
+
+class UnixHTTPConnection(HTTPConnection):
+    def __init__(self, path: str):
+        super().__init__("localhost")
+        self.unix_path = path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.connect(self.unix_path)
+
+
+def request(
+    connection: HTTPConnection, method: str, path: str, body: object = None
+) -> tuple[int, bytes]:
+    connection.request(
+        method, path, body=None if body is None else json.dumps(body).encode()
+    )
+    response = connection.getresponse()
+    return response.status, response.read()
+
+
+def expected() -> bytes:
+    gif = GIF.from_spec(SPEC)
+    file = BytesIO()
+    gif.save(file)
+    return file.getvalue()
+
+
+def test_server():
+    with RenderServer(("127.0.0.1", 0), workers=0) as server:
+        host, port = server.address  # type: ignore[misc]
+        connection = HTTPConnection(host, port)
+        assert request(connection, "POST", "/render", SPEC) == (200, expected())
+
+        status, data = request(connection, "POST", "/render", {"fragments": []})
+        assert (status, data) == (400, b"ValueError: You have not added any fragments")
+        status, _ = request(connection, "POST", "/render", {**SPEC, "path": "x.gif"})
+        assert status == 400
+        status, _ = request(connection, "POST", "/render", [])
+        assert status == 400
+        status, _ = request(connection, "GET", "/render")
+        assert status == 404
+
+        status, data = request(connection, "GET", "/stats")
+        assert status == 200
+        stats = json.loads(data)
+        assert (stats["requests"], stats["rendered"], stats["errors"]) == (2, 1, 1)
+        assert (stats["queued"], stats["rendering"]) == (0, 0)
+        connection.close()
+
+
+def test_server_queue(monkeypatch: pytest.MonkeyPatch):
+    started, release = threading.Event(), threading.Event()
+
+    def slow_render_gif(spec_gif, start):
+        started.set()
+        release.wait()
+        return b"gif", 0.0
+
+    monkeypatch.setattr(gif, "_render_gif", slow_render_gif)
+    with RenderServer(("127.0.0.1", 0), workers=0, max_queue=0) as server:
+        results = []
+        thread = threading.Thread(target=lambda: results.append(server.render(SPEC)))
+        thread.start()
+        started.wait()
+        assert server.render(SPEC) == (503, b"The queue is full")
+        assert server.stats()["rendering"] == 1
+        release.set()
+        thread.join()
+        assert results == [(200, b"gif")]
+        assert server.stats()["rejected"] == 1
+
+    with ExceptionWrapper(ValueError("max_queue must be greater than or equal to 0")):
+        RenderServer(("127.0.0.1", 0), workers=0, max_queue=-1)
+
+
+def test_server_errors(monkeypatch: pytest.MonkeyPatch):
+    def failing_render_gif(spec_gif, start):
+        raise OSError("No space left on device")
+
+    monkeypatch.setattr(gif, "_render_gif", failing_render_gif)
+    with RenderServer(("127.0.0.1", 0), workers=0) as server:
+        # a wrong spec is the mistake of the client
+        status, data = server.render({"fragments": [{"type": "video"}]})
+        assert status == 400 and data.startswith(b"ValueError: ")
+        status, _ = server.render({"fragments": [{"type": "text", "txt": "x"}]})
+        assert status == 400
+        # the rendering of a valid spec failed
+        assert server.render(SPEC) == (500, b"OSError: No space left on device")
+        stats = server.stats()
+        assert (stats["rendered"], stats["errors"]) == (0, 3)
+
+
+def test_server_workers():
+    children = len(multiprocessing.active_children())
+    server = RenderServer(("127.0.0.1", 0), workers=2)
+    # the workers are running and warmed up before the first request
+    assert len(multiprocessing.active_children()) == children + 2
+    assert server.stats()["requests"] == 0
+    with server:
+        host, port = server.address  # type: ignore[misc]
+        connection = HTTPConnection(host, port)
+        assert request(connection, "POST", "/render", SPEC) == (200, expected())
+        connection.close()
+    assert len(multiprocessing.active_children()) == children
+
+
+@pytest.mark.skipif(not hasattr(socket, "AF_UNIX"), reason="no unix sockets")
+def test_server_unix(tmp_path: Path):
+    path = str(tmp_path / "render.sock")
+    with RenderServer(path, workers=1) as server:
+        assert server.address == path
+        connection = UnixHTTPConnection(path)
+        assert request(connection, "POST", "/render", SPEC) == (200, expected())
+        connection.close()
+    assert not Path(path).exists()
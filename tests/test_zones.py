@@ -0,0 +1,69 @@
+from PIL import Image
+
+from gif import GIF
+from tests.utils import ExceptionWrapper, leds_frames
+
+
+def zone_frames(gif: GIF) -> tuple[list[bytes], list[int]]:
+    (fragment,) = gif._fragments
+    return leds_frames(fragment), list(fragment.durations())
+
+
+def region(frame: bytes, columns: int, box: tuple[int, int, int, int]) -> bytes:
+    image = Image.frombytes("L", (columns, len(frame) // columns), frame)
+    return image.crop(box).tobytes()
+
+
+def test_zones():
+    label = GIF(10, 9, progress_bar=False)
+    label.add_text_fragment("LBL", direction="none")
+    ticker = GIF(30, 9, progress_bar=False)
+    ticker.add_text_fragment("ticker", duration=20)
+    clock = GIF(10, 9, progress_bar=False)
+    clock.add_text_fragment("1", direction="none", duration=300)
+    clock.add_text_fragment("2", direction="none", duration=300)
+
+    gif = GIF(50, 9, progress_bar=False)
+    gif.add_zones_fragment([(0, 0, label), (10, 0, ticker), (40, 0, clock)])
+    frames, durations = zone_frames(gif)
+
+    ticker_frames = leds_frames(ticker._fragments[0])
+    assert len(frames) == len(ticker_frames)
+    # the fragment lasts as long as the longest zone
+    assert sum(durations) == max(20 * len(ticker_frames), 600)
+    for frame, ticker_frame in zip(frames, ticker_frames):
+        assert region(frame, 50, (10, 0, 40, 9)) == ticker_frame
+    # the clock changes after 300 ms
+    clock_frames = [bytes(next(fragment.frames())) for fragment in clock._fragments]
+    for frame_index, expected in ((0, clock_frames[0]), (15, clock_frames[1])):
+        assert region(frames[frame_index], 50, (40, 0, 50, 9)) == expected
+
+
+def test_zones_static():
+    # Unchanged frames are merged, overlapping zones are drawn in order
+    background = GIF(20, 9, progress_bar=False)
+    background.add_image_fragment(Image.new("RGB", (20, 9)), direction="none")
+    top = GIF(5, 3, progress_bar=False)
+    top.add_image_fragment(Image.new("RGB", (5, 3), "white"), duration=100)
+    top.add_image_fragment(Image.new("RGB", (5, 3), "white"), duration=100)
+
+    gif = GIF(20, 9, progress_bar=False)
+    gif.add_zones_fragment([(0, 0, background), (2, 2, top)])
+    frames, durations = zone_frames(gif)
+    assert durations == [100, 100]
+    assert frames[0] == frames[1]
+    assert frames[0].count(0) == 15
+    assert region(frames[0], 20, (2, 2, 7, 5)) == bytes(15)
+
+
+def test_zones_exceptions():
+    zone = GIF(10, 9, progress_bar=False)
+    with ExceptionWrapper(ValueError("You have not added any zones")):
+        GIF().add_zones_fragment([])
+    with ExceptionWrapper(ValueError("The zone (0, 0) has no fragments")):
+        GIF().add_zones_fragment([(0, 0, zone)])
+    zone.add_text_fragment("zone")
+    with ExceptionWrapper(
+        ValueError("The zone (75, 0, 10, 9) does not fit into the current gif (79, 9)")
+    ):
+        GIF().add_zones_fragment([(75, 0, zone)])
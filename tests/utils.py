@@ -4,7 +4,7 @@ from itertools import zip_longest
 
 from PIL import Image
 
-from gif import GIF
+from gif import GIF, Fragment
 
 
 class ExceptionWrapper:
@@ -25,6 +25,14 @@ class ExceptionWrapper:
         raise Exception(f"{self.exception!r} != {exc_val!r}")
 
 
+def leds_frames(fragment: Fragment) -> list[bytes]:
+    frames = []
+    for frame in fragment.frames():
+        assert not isinstance(frame, Image.Image)
+        frames.append(bytes(frame))
+    return frames
+
+
 def compare_gif(gif: GIF, path: str | Path):
     test_file = BytesIO()
     gif.progress_bar = False